@@ -52,6 +52,13 @@ participant_types_file_path = os.path.join(COLUMNS_NAMES_DIR, "participant_types
 imputation_map_path = os.path.join(BASE_DIR, os.path.join(COLUMNS_NAMES_DIR, "column_names_matching", "imputation_map.csv"))
 stepped_care_map_path = os.path.join(BASE_DIR, os.path.join(COLUMNS_NAMES_DIR, "column_names_matching", "stepped_care_column_renames_map.csv"))
 questionnaires_database_names_map_path = os.path.join(BASE_DIR, os.path.join(COLUMNS_NAMES_DIR, "column_names_matching", "questionnaires_database_names_map.xlsx"))
+questionnaire_parallel_names_path = os.path.join(BASE_DIR, "questionnaire_parallel_names.csv")
+
+
+# compiled artifacts
+COMPILED_DIR = os.path.join(BASE_DIR, r"Data/compiled")
+metadata_snapshot_path = os.path.join(COMPILED_DIR, "metadata_snapshot.pkl")
+scoring_cache_path = os.path.join(COMPILED_DIR, "scoring_cache.pkl")
 
 
 
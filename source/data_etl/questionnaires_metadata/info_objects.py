@@ -1,7 +1,11 @@
+import sys
+import textwrap
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
 from source.consts.enums import QuestionType, ScoringMethod, UniqueScoringMethod, C_SSRS_Scoring
 from source.utils.question_types.question_type_utils import Validator
+from source.utils.question_types.search_index import QuestionSearchIndex
+import numpy as np
 import pandas as pd
 from source.consts.questionnaires_names import Questionnaire, get_questionnaire
 
@@ -32,9 +36,14 @@ class ScoresList:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class QuestionInfo:
-    """Metadata for a single question."""
+    """
+    Metadata for a single question.
+
+    Slotted, and the repeated name fields are interned, so large metadata sets stay compact;
+    choices are the shared FrozenChoices of their scale.
+    """
     variable_name: str
     question_text: str
     question_type: QuestionType
@@ -50,30 +59,135 @@ class QuestionInfo:
     project_source: Optional[str] = None
     parallel_question_name: Optional[str] = None
 
+    interned_fields = ('variable_name', 'questionnaire_name', 'questionnaire_alternative_name', 'ancestor',
+                       'step_questionnaire_name', 'project_source', 'parallel_question_name')
+    intern_names = True  # switched off only to measure the un-interned layout (memory_benchmark)
+
+    def __post_init__(self):
+        if not self.intern_names:
+            return
+        for name in self.interned_fields:
+            value = getattr(self, name)
+            if type(value) is str:
+                setattr(self, name, sys.intern(value))
+
     def __repr__(self):
         return self.variable_name
 
 
+def _index_key(value: Any) -> Any:
+    """Case-insensitive key for the QuestionsList indexes; missing values (None / NaN) share one key."""
+    if isinstance(value, str):
+        return value.lower()
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value
+
+
+class QuestionsTable:
+    """
+    Columnar, read-only view of a list of questions (one row per question, in list order).
+
+    Type, source and questionnaire are categoricals; the shortened text and the number of choices
+    are precomputed, so views and filters slice this frame instead of rebuilding records.
+    """
+
+    short_text_width = 120
+
+    def __init__(self, questions: List[QuestionInfo]):
+        self.df = pd.DataFrame({
+            'variable_name': [q.variable_name for q in questions],
+            'question_text': [q.question_text for q in questions],
+            'short_text': [self.shorten(q.question_text) for q in questions],
+            'question_type': pd.Categorical([getattr(q.question_type, 'name', str(q.question_type))
+                                             for q in questions]),
+            'project_source': pd.Categorical([q.project_source or "" for q in questions]),
+            'questionnaire_name': pd.Categorical([str(q.questionnaire_name or "") for q in questions]),
+            'is_timestamp': np.array([bool(q.is_timestamp) for q in questions], dtype=bool),
+            'is_exceptional_item': np.array([bool(q.is_exceptional_item) for q in questions], dtype=bool),
+            'n_choices': np.array([len(q.choices) if isinstance(q.choices, dict) else 0 for q in questions],
+                                  dtype=int),
+        })
+        # lower-cased variable name -> first row, the same matching as QuestionsList.get_by_variable_name
+        self.positions: Dict[Any, int] = {}
+        for position, name in enumerate(self.df['variable_name']):
+            self.positions.setdefault(_index_key(name), position)
+
+    @classmethod
+    def shorten(cls, text) -> str:
+        return textwrap.shorten(str(text or ""), width=cls.short_text_width, placeholder="…")
+
+    def get_positions(self, variable_names: List[str]) -> List[int]:
+        """Row of each name in `variable_names` (-1 when unknown)."""
+        return [self.positions.get(_index_key(name), -1) for name in variable_names]
+
+    def select(self, variable_names: List[str]) -> pd.DataFrame:
+        """Rows of `variable_names`, in that order; unknown names give an all-missing row."""
+        return self.df.reindex(self.get_positions(variable_names)).reset_index(drop=True)
+
+
 @dataclass
 class QuestionsList:
     """Holds a list of all questions' metadata and provides query methods."""
     questions: List[QuestionInfo]
     assert_presence: Optional[bool] = False
+    # attribute -> {lower-cased value -> questions}, kept in sync by append
+    _indexes: Dict[str, Dict[Any, List[QuestionInfo]]] = field(default_factory=dict, init=False, repr=False)
+    # bidirectional mother <-> father map, e.g. {'erq_1_m': 'erq_1_f', 'erq_1_f': 'erq_1_m'}
+    parallel_questions: Dict[str, str] = field(default_factory=dict, init=False, repr=False)
+    # columnar view, built on first use and dropped whenever a question is added
+    _table: Optional[QuestionsTable] = field(default=None, init=False, repr=False, compare=False)
+    # trigram search index over the table, built on first search and dropped with the table
+    _search_index: Optional[QuestionSearchIndex] = field(default=None, init=False, repr=False, compare=False)
+
+    indexed_attributes = ('variable_name', 'questionnaire_name', 'ancestor', 'project_source', 'question_type')
 
     def __post_init__(self):
         variables = [q.variable_name for q in self.questions]
         unique_variables = set(variables)
         assert len(variables) == len(unique_variables)
+        self._build_indexes()
 
-    def update_parallel_question_name(self, variable_name: str, new_q_name: str) -> Optional[QuestionInfo]:
+    def _build_indexes(self):
+        self._indexes = {attribute: {} for attribute in self.indexed_attributes}
         for q in self.questions:
-            if q.variable_name.lower() == variable_name.lower():
-                q.parallel_question_name = new_q_name
-
+            self._add_to_indexes(q)
+
+    def _add_to_indexes(self, question_info: QuestionInfo):
+        for attribute, index in self._indexes.items():
+            index.setdefault(_index_key(getattr(question_info, attribute)), []).append(question_info)
+
+    def _lookup(self, attribute: str, value: Any) -> List[QuestionInfo]:
+        return self._indexes[attribute].get(_index_key(value), [])
+
+    def update_parallel_question_name(self, variable_name: str, new_q_name: str) -> Dict[str, str]:
+        return self.add_parallel_questions({variable_name: new_q_name})
+
+    def add_parallel_questions(self, pairs: Dict[str, str]) -> Dict[str, str]:
+        """
+        Set parallel_question_name for every {variable_name: parallel_name} pair in one pass
+        and register the non-trivial pairs in both directions of `parallel_questions`.
+        """
+        for variable_name, parallel_name in pairs.items():
+            if QuestionInfo.intern_names:
+                parallel_name = sys.intern(parallel_name)
+            for q in self._lookup('variable_name', variable_name):
+                q.parallel_question_name = parallel_name
+            if variable_name != parallel_name:
+                self.parallel_questions[variable_name] = parallel_name
+                self.parallel_questions.setdefault(parallel_name, variable_name)
+        return self.parallel_questions
+
+    def get_parallel_question(self, variable_name: str) -> Optional[str]:
+        """Name of the mother/father counterpart of `variable_name`, if there is one."""
+        requested_qs = self._lookup('variable_name', variable_name)
+        if len(requested_qs) == 0:
+            return None
+        return self.parallel_questions.get(requested_qs[0].variable_name)
 
 
     def get_by_variable_name(self, variable_name: str) -> Optional[QuestionInfo]:
-        requested_qs = [q for q in self.questions if q.variable_name.lower() == variable_name.lower()]
+        requested_qs = self._lookup('variable_name', variable_name)
         if len(requested_qs) == 0:
             if self.assert_presence:
                 raise ValueError(f"question not found {variable_name}")
@@ -91,16 +205,52 @@ class QuestionsList:
             return [q for q in self.questions if q.is_timestamp]
 
     def get_by_questionnaire(self, questionnaire_name: str, get_q_names=False):
+        return self._get_by('questionnaire_name', questionnaire_name, get_q_names)
+
+    def get_by_ancestor(self, ancestor: str, get_q_names=False):
+        """One-hot questions expanded from the checkbox field `ancestor`."""
+        return self._get_by('ancestor', ancestor, get_q_names)
+
+    def get_by_project_source(self, project_source: str, get_q_names=False):
+        return self._get_by('project_source', project_source, get_q_names)
+
+    def get_by_question_type(self, question_type: QuestionType, get_q_names=False):
+        return self._get_by('question_type', question_type, get_q_names)
+
+    def _get_by(self, attribute: str, value: Any, get_q_names=False):
         if get_q_names:
-            return [q.variable_name for q in self.questions if q.questionnaire_name.lower() == questionnaire_name.lower()]
+            return [q.variable_name for q in self._lookup(attribute, value)]
         else:
-            return [q for q in self.questions if q.questionnaire_name.lower() == questionnaire_name.lower()]
+            return list(self._lookup(attribute, value))
 
     def search_by_label(self, word: str) -> List[QuestionInfo]:
-        return [q for q in self.questions if word.lower() in q.question_text.lower()]
+        """Questions whose text contains `word` (case-insensitive), in list order."""
+        return [self.questions[position] for position in self.get_search_index().find_label_positions(word)]
+
+    def search(self, query: str, fuzzy: bool = True, limit: Optional[int] = None) -> List[QuestionInfo]:
+        """Ranked (Hebrew-aware, optionally fuzzy) search over variable names, texts and questionnaires."""
+        return [self.questions[position] for position in self.get_search_index().search(query, fuzzy=fuzzy,
+                                                                                        limit=limit).index]
 
     def append(self, question_info: QuestionInfo):
         self.questions.append(question_info)
+        self._add_to_indexes(question_info)
+        self._table = None
+        self._search_index = None
+
+    def extend(self, questions: List[QuestionInfo]):
+        for question_info in questions:
+            self.append(question_info)
+
+    def get_table(self) -> QuestionsTable:
+        if self._table is None:
+            self._table = QuestionsTable(self.questions)
+        return self._table
+
+    def get_search_index(self) -> QuestionSearchIndex:
+        if self._search_index is None:
+            self._search_index = QuestionSearchIndex(self.get_table().df)
+        return self._search_index
 
     def get_question_names(self):
         return [i.variable_name for i in self.questions]
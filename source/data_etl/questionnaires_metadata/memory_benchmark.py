@@ -0,0 +1,111 @@
+"""
+Memory of the QuestionInfo storage, per 1k questions, split by the change that saves it.
+
+All layouts hold the values the QuestionLoader actually produces (pd.read_csv already shares equal
+strings within a column). Sizes are deep sizes of the questions' own data - the objects, their
+strings and their choices - where an object shared by several questions is counted once.
+
+objects:   a regular (__dict__ based) dataclass vs the slotted QuestionInfo, same values.
+interning: the name fields as the loader produces them vs interned with sys.intern.
+choices:   a choices dict per question (as parsed row by row before the shared FrozenChoices)
+           vs one FrozenChoices per scale.
+
+Run from the repository root:
+    python -m source.data_etl.questionnaires_metadata.memory_benchmark
+"""
+import sys
+from dataclasses import fields, make_dataclass
+from typing import Dict, Iterable, List
+
+from source.data_etl.questionnaires_metadata.info_objects import QuestionInfo
+
+LegacyQuestionInfo = make_dataclass("LegacyQuestionInfo", [(f.name, f.type) for f in fields(QuestionInfo)])
+
+
+def _deep_size(objects: Iterable, seen: set) -> int:
+    """Bytes of `objects`, their strings, dicts and tuples; objects already in `seen` are skipped."""
+    size = 0
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            size += sys.getsizeof(obj)
+        elif isinstance(obj, dict):
+            size += sys.getsizeof(obj)
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            size += sys.getsizeof(obj)
+            stack.extend(obj)
+        elif isinstance(obj, (QuestionInfo, LegacyQuestionInfo)):
+            size += sys.getsizeof(obj)
+            if hasattr(obj, "__dict__"):
+                size += sys.getsizeof(obj.__dict__)
+            stack.extend(getattr(obj, f.name) for f in fields(obj))
+        # enums and validators are shared by every layout and are not counted
+    return size
+
+
+def _size(questions: List, field_names: Iterable[str] = None) -> int:
+    """Deep size of the questions, or only of the given fields of every question."""
+    if field_names is None:
+        return _deep_size(questions, set())
+    return _deep_size([getattr(q, name) for q in questions for name in field_names], set())
+
+
+def load_questions(intern: bool = True) -> List[QuestionInfo]:
+    """Questions as built by the QuestionLoader; with intern=False the name fields are left as loaded."""
+    from source.data_etl.questionnaires_metadata.metadata_registry import MetadataRegistry
+
+    QuestionInfo.intern_names = intern
+    try:
+        return MetadataRegistry().questions_list.questions
+    finally:
+        QuestionInfo.intern_names = True
+
+
+def _as_legacy(questions: List[QuestionInfo]) -> List:
+    return [LegacyQuestionInfo(**{f.name: getattr(q, f.name) for f in fields(QuestionInfo)}) for q in questions]
+
+
+def run_benchmark(n_questions: int = 1000) -> Dict[str, float]:
+    """KB per 1k questions before / after each change, and in total."""
+    loaded = load_questions(intern=False)[:n_questions]
+    interned = load_questions(intern=True)[:n_questions]
+    scale = 1000 / len(loaded) / 1024
+
+    # the same question values in both layouts: only the per-object overhead differs
+    objects_before = _size(_as_legacy(loaded)) - _size(loaded, [f.name for f in fields(QuestionInfo)])
+    objects_after = _size(loaded) - _size(loaded, [f.name for f in fields(QuestionInfo)])
+
+    interning_before = _size(loaded, QuestionInfo.interned_fields)
+    interning_after = _size(interned, QuestionInfo.interned_fields)
+
+    per_question_choices = [dict(q.choices) if isinstance(q.choices, dict) else q.choices for q in interned]
+    choices_before = _deep_size(per_question_choices, set())
+    choices_after = _size(interned, ['choices'])
+
+    legacy = _as_legacy(loaded)
+    for question, choices in zip(legacy, per_question_choices):
+        question.choices = choices
+    total_before, total_after = _size(legacy), _size(interned)
+
+    results = {'questions': len(loaded)}
+    for name, before, after in (('objects', objects_before, objects_after),
+                                ('interning', interning_before, interning_after),
+                                ('choices', choices_before, choices_after),
+                                ('total', total_before, total_after)):
+        results[f'{name}_before_kb_per_1k'] = before * scale
+        results[f'{name}_after_kb_per_1k'] = after * scale
+    return results
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print(f"{results['questions']} questions (KB / 1k questions):")
+    for name in ('objects', 'interning', 'choices', 'total'):
+        before, after = results[f'{name}_before_kb_per_1k'], results[f'{name}_after_kb_per_1k']
+        print(f"  {name:<10} before {before:7.0f}  after {after:7.0f}  ({1 - after / before:.0%} less)")
@@ -0,0 +1,74 @@
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from source.data_etl.questionnaires_metadata.info_objects import QuestionsList, ScoresList, QuestionnairesList
+
+
+class MetadataRegistry:
+    """
+    Process-wide owner of the metadata graph.
+
+    The loaders (QuestionLoader, ScoreUtilsLoader / ScoresLoader, QuestionnaireLoader) take a registry
+    as a dependency and pull the pieces they need from it, so the questions map and the questions list
+    are built once per process instead of once per loader.
+    """
+
+    _default: Optional["MetadataRegistry"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, init_validator: bool = True):
+        self.init_validator = init_validator
+        self._lock = threading.RLock()
+        self._questions_map = None
+        self._questions_list = None
+        self._scores_list = None
+        self._questionnaires_list = None
+
+    @classmethod
+    def get_default(cls) -> "MetadataRegistry":
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @classmethod
+    def reset_default(cls):
+        with cls._default_lock:
+            cls._default = None
+
+    @property
+    def questions_map(self) -> pd.DataFrame:
+        with self._lock:
+            if self._questions_map is None:
+                from source.utils.question_types.questions_mapping_creator import QuestionsMappingCreator
+                self._questions_map = QuestionsMappingCreator().run()
+            return self._questions_map
+
+    @property
+    def questions_list(self) -> QuestionsList:
+        with self._lock:
+            if self._questions_list is None:
+                from source.data_etl.questionnaires_metadata.stepped_care.single_question.questions_loader import \
+                    QuestionLoader
+                self._questions_list = QuestionLoader(init_validator=self.init_validator,
+                                                      registry=self).load_questions()
+            return self._questions_list
+
+    @property
+    def scores_list(self) -> ScoresList:
+        with self._lock:
+            if self._scores_list is None:
+                from source.data_etl.questionnaires_metadata.stepped_care.scores.scores_loader import ScoresLoader
+                self._scores_list = ScoresLoader(registry=self).load()
+            return self._scores_list
+
+    @property
+    def questionnaires_list(self) -> QuestionnairesList:
+        with self._lock:
+            if self._questionnaires_list is None:
+                from source.data_etl.questionnaires_metadata.stepped_care.questionnaire.questionnaire_loader import \
+                    QuestionnaireLoader
+                self._questionnaires_list = QuestionnaireLoader(registry=self).load_questionnaires()
+            return self._questionnaires_list
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import warnings
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from source.consts import data_files_paths
+from source.consts.data_files_paths import metadata_snapshot_path
+from source.data_etl.questionnaires_metadata.info_objects import QuestionsList, ScoresList, QuestionnairesList
+
+# data_files_paths names of the files the metadata loaders read (raw exports are not metadata inputs)
+METADATA_INPUT_FILES = (
+    'scmci_path_df',
+    'stepped_data_dict',
+    'DataDictionary_path_df',
+    'exceptional_items_path_df',
+    'invalid_columns_path_df',
+    'numeric_variables_range_path_df',
+    'immi_column_names_path',
+    'qualtrics_column_names_path',
+    'participant_types_file_path',
+    'imputation_map_path',
+    'stepped_care_map_path',
+    'questionnaires_database_names_map_path',
+    'questionnaire_parallel_names_path',
+)
+# the code that builds the graph (consts, loaders, info objects, scorers) - any edit invalidates the snapshot
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@dataclass
+class MetadataSnapshot:
+    """Fully built metadata graph, keyed by the content of the files and the code it was built from."""
+    input_hashes: Dict[str, Optional[str]]
+    questions_list: QuestionsList
+    scores_list: ScoresList
+    questionnaires_list: QuestionnairesList
+
+    def is_up_to_date(self, input_hashes: Dict[str, Optional[str]]) -> bool:
+        return self.input_hashes == input_hashes
+
+
+def get_input_files() -> Dict[str, str]:
+    """Path of every metadata input file, by its data_files_paths name."""
+    return {name: getattr(data_files_paths, name) for name in METADATA_INPUT_FILES}
+
+
+def _file_hash(path: str) -> Optional[str]:
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_source_hash(source_dir: str = SOURCE_DIR) -> str:
+    """One digest over the path and content of every .py file of the `source` package."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, source_dir).encode("utf-8"))
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compute_input_hashes() -> Dict[str, Optional[str]]:
+    """Content hash per input file (missing files are recorded as None) and of the source code."""
+    input_hashes = {name: _file_hash(path) for name, path in sorted(get_input_files().items())}
+    input_hashes['source_code'] = compute_source_hash()
+    return input_hashes
+
+
+def build_snapshot() -> MetadataSnapshot:
+    """Build QuestionsList / ScoresList / QuestionnairesList from the raw files."""
+    from source.data_etl.questionnaires_metadata.metadata_registry import MetadataRegistry
+
+    input_hashes = compute_input_hashes()
+    # a fresh registry, so the snapshot always reflects the files on disk
+    registry = MetadataRegistry()
+
+    return MetadataSnapshot(
+        input_hashes=input_hashes,
+        questions_list=registry.questions_list,
+        scores_list=registry.scores_list,
+        questionnaires_list=registry.questionnaires_list,
+    )
+
+
+def save_snapshot(snapshot: MetadataSnapshot, path: str = metadata_snapshot_path):
+    """
+    Write the snapshot atomically: each writer pickles to its own temp file next to `path`
+    and renames it over `path`, so concurrent compiles never see a half-written file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def compile_snapshot(path: str = metadata_snapshot_path) -> MetadataSnapshot:
+    """Build the snapshot from the raw files and save it."""
+    snapshot = build_snapshot()
+    save_snapshot(snapshot, path)
+    return snapshot
+
+
+def _read_snapshot(path: str) -> Optional[MetadataSnapshot]:
+    """The pickled snapshot at `path`, or None when it is missing or cannot be unpickled."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        # corrupt, truncated or written by incompatible code - rebuild
+        return None
+    return snapshot if isinstance(snapshot, MetadataSnapshot) else None
+
+
+def load_snapshot(path: str = metadata_snapshot_path, rebuild: bool = True) -> Optional[MetadataSnapshot]:
+    """
+    Load the compiled snapshot; recompile it when it is missing, unreadable, or when any input
+    file or any module of the `source` package changed since it was built.
+    When the snapshot cannot be written (e.g. a read-only checkout), the in-memory build is returned.
+    """
+    snapshot = _read_snapshot(path)
+    if snapshot is not None and snapshot.is_up_to_date(compute_input_hashes()):
+        return snapshot
+
+    if not rebuild:
+        return None
+    snapshot = build_snapshot()
+    try:
+        save_snapshot(snapshot, path)
+    except OSError as e:
+        warnings.warn(f"metadata snapshot not saved to {path}: {e}")
+    return snapshot
+
+
+if __name__ == "__main__":
+    snapshot = compile_snapshot()
+    print(f"compiled {len(snapshot.questions_list.questions)} questions, "
+          f"{len(snapshot.scores_list.scores)} scores, "
+          f"{len(snapshot.questionnaires_list.questionnaires)} questionnaires -> {metadata_snapshot_path}")
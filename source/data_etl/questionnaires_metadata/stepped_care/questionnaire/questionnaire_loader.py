@@ -1,12 +1,10 @@
 from typing import List
 
-from source.data_etl.questionnaires_metadata.stepped_care.scores.scores_loader import ScoresLoader
-from source.utils.question_types.questions_mapping_creator import QuestionsMappingCreator
 import pandas as pd
 from source.consts.data_files_paths import participant_types_file_path, scmci_path_df, \
     questionnaires_database_names_map_path
 from source.data_etl.questionnaires_metadata.info_objects import QuestionnairesList, QuestionnaireInfo, QuestionInfo
-from source.data_etl.questionnaires_metadata.stepped_care.single_question.questions_loader import QuestionLoader
+from source.data_etl.questionnaires_metadata.metadata_registry import MetadataRegistry
 
 class QuestionnaireLoader:
 
@@ -24,17 +22,18 @@ class QuestionnaireLoader:
      }
 
 
-    def __init__(self):
+    def __init__(self, registry: MetadataRegistry = None):
+        self.registry = registry if registry is not None else MetadataRegistry.get_default()
         self.questionnaires_list = None
 
         renames = pd.read_excel(questionnaires_database_names_map_path)
         self.renames = {row['questionnaire']: row['database-name'] for _, row in renames.iterrows()}
 
         self.participant_types_map = self._get_participants_type_map()
-        self.questions_list = QuestionLoader().load_questions()
-        self.scores_list = ScoresLoader().load()
-        self.qmc = QuestionsMappingCreator()
-        self.questions_map_df = self.qmc.run()
+        self.scmci_df, self.scmci_index = self._load_scmci_index()
+        self.questions_list = self.registry.questions_list
+        self.scores_list = self.registry.scores_list
+        self.questions_map_df = self.registry.questions_map
 
 
     def load_questionnaires(self, subset: List[str] = None):
@@ -133,19 +132,32 @@ class QuestionnaireLoader:
             # print(f"contradiction found between predefined questions and collected question {questionnaire_name}: {diff}")
 #           assert  len(diff) == 0, f"contradiction found between predefined questions and collected question {questionnaire_name}: {diff}"
 
-    def _get_data_from_scmci(self, questions, exceptional_items, timestamp_items):
-
-        def get_questionnaire(x, questions_list):
-            is_present = [(q in x) for q in questions_list]
-            return all(is_present)
-
-        essential_questions = [q for q in questions if q not in exceptional_items + timestamp_items]
+    @staticmethod
+    def _load_scmci_index():
+        """
+        Read the SCMCI study measures once and index it: variable name -> positions of the rows
+        whose 'Variable Name' cell (newline separated) lists that variable.
+        """
         df = pd.read_excel(scmci_path_df)
-        df['q_list'] = df['Variable Name'].str.split("\n")
-        mask = df['q_list'].apply(get_questionnaire, args=[essential_questions])
+        scmci_index = {}
+        for position, variables in enumerate(df['Variable Name'].str.split("\n")):
+            for variable in variables:
+                scmci_index.setdefault(variable, set()).add(position)
+        return df, scmci_index
 
-        if mask.any():
-            questionnaire_row = df.loc[mask].iloc[0]
+    def _get_data_from_scmci(self, questions, exceptional_items, timestamp_items):
+        excluded = set(exceptional_items) | set(timestamp_items)
+        essential_questions = {q for q in questions if q not in excluded}
+
+        # rows listing every essential question (every row when there are none)
+        candidate_rows = set(range(len(self.scmci_df)))
+        for q in essential_questions:
+            candidate_rows &= self.scmci_index.get(q, set())
+            if not candidate_rows:
+                break
+
+        if candidate_rows:
+            questionnaire_row = self.scmci_df.iloc[min(candidate_rows)]
 
             return {
                 'Abbreviated_Name': questionnaire_row['Abbreviated Name'],
@@ -9,7 +9,7 @@ from source.consts.scores.reverse_items import Reverse_Items
 from source.consts.questionnaires_names import Questionnaire, get_questionnaire
 import sys
 import os  # from source.data_etl.metadata.single_question.questions_loader import QuestionLoader
-from source.data_etl.questionnaires_metadata.stepped_care.single_question.questions_loader import QuestionLoader
+from source.data_etl.questionnaires_metadata.metadata_registry import MetadataRegistry
 
 
 sys.path.insert(0, os.getcwd())
@@ -22,8 +22,9 @@ class ScoreUtilsLoader:
         'mother': 'father'
     }
 
-    def __init__(self):
-        self.question_list = QuestionLoader().load_questions()
+    def __init__(self, registry: MetadataRegistry = None):
+        self.registry = registry if registry is not None else MetadataRegistry.get_default()
+        self.question_list = self.registry.questions_list
         self.scores_columns = Scores_Columns.copy()
         self.clusters = Clusters.copy()
         self.reverse_items = Reverse_Items.copy()
@@ -166,7 +167,7 @@ class ScoreUtilsLoader:
             else:
                 return True
         scoring_columns = scoring_columns.copy()
-        questions_info = QuestionLoader().load_questions()
+        questions_info = self.question_list
 
         for questionnaire, items in scoring_columns.items():
             if items == DEFAULT:
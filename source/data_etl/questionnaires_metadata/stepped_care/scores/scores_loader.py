@@ -7,11 +7,12 @@ from source.consts.questionnaires_names import get_questionnaire
 from source.data_etl.questionnaires_metadata.info_objects import ScoresList, ScoringInfo
 from source.data_etl.questionnaires_metadata.stepped_care.scores.score_utils_loader import ScoreUtilsLoader
 from source.consts.questionnaires_names import Questionnaire
+from source.data_etl.questionnaires_metadata.metadata_registry import MetadataRegistry
 
 class ScoresLoader:
 
-    def __init__(self):
-        self.scores_utils = ScoreUtilsLoader()
+    def __init__(self, registry: MetadataRegistry = None):
+        self.scores_utils = ScoreUtilsLoader(registry=registry)
         self.scores_list = None
 
     def load(self):
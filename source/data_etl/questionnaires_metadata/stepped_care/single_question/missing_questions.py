@@ -5,6 +5,8 @@ from source.consts.standard_names import RedcapEventName
 
 class QualtricsAgeQuestion(QuestionInfo):
 
+    __slots__ = ()
+
     def __init__(self):
 
         params = {
@@ -22,6 +24,8 @@ class QualtricsAgeQuestion(QuestionInfo):
 
 class RedcapEventNameQuestion(QuestionInfo):
 
+    __slots__ = ()
+
     def __init__(self):
 
         params = {
@@ -39,6 +43,8 @@ class RedcapEventNameQuestion(QuestionInfo):
 
 class TimestampQuestion(QuestionInfo):
 
+    __slots__ = ()
+
     def __init__(self, variable_name, questionnaire):
 
         params = {
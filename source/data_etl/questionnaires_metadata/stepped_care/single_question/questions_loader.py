@@ -4,9 +4,11 @@ from source.consts.enums import DataDictQuestionType
 from source.data_etl.questionnaires_metadata.info_objects import *
 from source.data_etl.questionnaires_metadata.stepped_care.single_question.missing_questions import *
 from source.utils.question_types.multiple_choice_loader import MultipleChoiceLoader, LoadSlider
-from source.utils.question_types.questions_mapping_creator import QuestionsMappingCreator
+from source.utils.question_types.question_type_utils import ValidatorFactory
+from source.data_etl.questionnaires_metadata.metadata_registry import MetadataRegistry
+from source.data_preprocessing.utils.timestamp_creator import TimestampCreator
 import pandas as pd
-from source.utils.question_types.textual_question_type import normalize_for_match
+from source.utils.question_types.textual_question_type import normalize_series
 from source.consts.data_files_paths import participant_types_file_path, scmci_path_df, \
     questionnaires_database_names_map_path
 
@@ -28,13 +30,28 @@ class QuestionLoader:
         'mother': 'father'
     }
 
-    def __init__(self, init_validator=True):
+    # data-dictionary forms that hold two questionnaires; items of the 'other' one start with its (lower-cased) name
+    splitting_map = {
+        "immirisk_adolescents_mast_athens": {
+            'default': "mast",
+            'other': "ATHENS"
+        },
+
+        "piu_cyberbulling": {
+            'default': "piu",
+            'other': "cyberbulling"
+        }
+    }
+
+    def __init__(self, init_validator=True, registry: MetadataRegistry = None):
         self.init_validator = init_validator
+        self.registry = registry if registry is not None else MetadataRegistry.get_default()
         self.questions_collection = []
         print(f"{exceptional_items_path_df = }")
         self.exceptional_items = pd.read_excel(exceptional_items_path_df)
-        self.qmc = QuestionsMappingCreator()
-        self.questionnaire_map = self.qmc.run()
+        self.exceptional_item_names = set(self.exceptional_items.question_name)
+        self.validator_factory = ValidatorFactory() if init_validator else None
+        self.questionnaire_map = self.registry.questions_map
         self.df = self.concat_data_dict()
 
         questionnaires_database_names_map = pd.read_excel(questionnaires_database_names_map_path)
@@ -74,8 +91,9 @@ class QuestionLoader:
 
     def load_questions(self):
 
-        for _, row in self.df.iterrows():
-            question_data, is_checkbox = self._setup(row)
+        basic_infos = self._extract_basic_info(self.df)
+        for row, basic_info in zip(self.df.to_dict('records'), basic_infos):
+            question_data, is_checkbox = self._setup(row, basic_info)
             if is_checkbox:
                 self.questions_collection.extend(self._expend_checkbox_questions(row, question_data))
             else:
@@ -97,75 +115,64 @@ class QuestionLoader:
 
 
     def _add_parallel_question_names(self, questions_list):
+        """
+        Pair the items of parent questionnaires with their mother/father counterpart in a single join
+        over the question names, and return the bidirectional parallel-question map.
+        """
+        variable_names = {q.variable_name.lower() for q in questions_list.questions}
+        pairs = {}
         for question_info in questions_list.questions:
-            questionnaire_name = question_info.questionnaire_name
-            if self.participant_types_map.get(questionnaire_name) is None:
+            if self.participant_types_map.get(question_info.questionnaire_name) is None:
                 continue
 
             new_q_name = self._replace_suffix(question_info.variable_name)
-            if questions_list.get_by_variable_name(new_q_name) is not None:
-                questions_list.update_parallel_question_name(question_info.variable_name, new_q_name)
+            if new_q_name.lower() in variable_names:
+                pairs[question_info.variable_name] = new_q_name
 
+        return questions_list.add_parallel_questions(pairs)
 
-    def _setup(self, row):
-        question_data = self._extract_basic_info(row)
+
+    def _setup(self, row, question_data):
         question_type, is_checkbox = self._get_question_type(row)
         extra_data = self._add_type_based_information(row, question_type, is_checkbox)
         question_data = question_data | extra_data
         return question_data, is_checkbox
 
 
-    def _extract_basic_info(self, row):
-        from source.data_preprocessing.utils.timestamp_creator import TimestampCreator
-
+    def _extract_basic_info(self, df):
         """
         questionnaire_database_name = name in redcap data-dictionary
         questionnaire_name = name in redcap columns list (how the researchers calls it)
 
+        Computed for all data-dictionary rows at once; returns one dict per row.
         """
-        questionnaire_name = self._split_questionnaires(row)
-
-        question_data = {
-            "variable_name": row[self.name_col],
-            "question_text": normalize_for_match(row[self.text_col]),
-            "questionnaire_alternative_name":  self.alternative_names.get(questionnaire_name, questionnaire_name), # get the database-name parallel, or return same value
-            "is_timestamp": TimestampCreator.is_datetime_column(row[self.name_col]),
-            'is_exceptional_item': row[self.name_col] in self.exceptional_items.question_name.tolist(),
-            "branching_logic": row[self.branching_col],
-            "questionnaire_name": questionnaire_name,
-            "step_questionnaire_name": row["orig_step_name"],
-            "project_source": row["project_source"]
-        }
-        return question_data
+        names = df[self.name_col]
+        questionnaire_names = self._split_questionnaires(df)
 
+        basic_info = pd.DataFrame({
+            "variable_name": names,
+            "question_text": normalize_series(df[self.text_col]),
+            "questionnaire_alternative_name": questionnaire_names.map(lambda q: self.alternative_names.get(q, q)), # get the database-name parallel, or return same value
+            "is_timestamp": TimestampCreator.is_datetime_columns(names),
+            'is_exceptional_item': names.isin(self.exceptional_item_names),
+            "branching_logic": df[self.branching_col],
+            "questionnaire_name": questionnaire_names,
+            "step_questionnaire_name": df["orig_step_name"],
+            "project_source": df["project_source"]
+        })
+        return basic_info.to_dict('records')
 
-    def _split_questionnaires(self, row):
 
-        splitting_map = {
-            "immirisk_adolescents_mast_athens": {
-                'default': "mast",
-                'other': "ATHENS"
-            },
+    def _split_questionnaires(self, df):
+        questionnaire_names = df[self.questionnaire_col].copy()
 
-            "piu_cyberbulling": {
-            'default': "piu",
-            'other': "cyberbulling"
-            }
-        }
+        for current_q_name, split in self.splitting_map.items():
+            is_current = df[self.questionnaire_col] == current_q_name
+            is_other = df[self.name_col].str.startswith(split['other'].lower(), na=False)
+            questionnaire_names[is_current & is_other] = split['other']
+            questionnaire_names[is_current & ~is_other] = split['default']
 
-        questionnaire_name = row[self.questionnaire_col]
-
-        for current_q_name in splitting_map.keys():
-            if questionnaire_name == current_q_name:
-                default = splitting_map[current_q_name]['default']
-                other = splitting_map[current_q_name]['other']
-
-                if row[self.name_col].startswith(other.lower()):
-                    return other
-                else:
-                    return default
-        else:
-            return questionnaire_name
+        return questionnaire_names
 
 
     def _get_question_type(self, row):
@@ -183,16 +190,17 @@ class QuestionLoader:
         # add redcap_event_name
         questions_list.append(RedcapEventNameQuestion())
 
-        missing_questions = [i for i in self.questionnaire_map.standard_question_name.to_list() \
-                             if i not in questions_list.get_question_names()]
-        for q in missing_questions:
-            if q.endswith('_timestamp'):
-                questionnaire = self.questionnaire_map.query(f"standard_question_name == '{q}'")['questionnaire'].iloc[0]
-                timestamp_q = TimestampQuestion(variable_name=q, questionnaire=questionnaire)
-                questions_list.append(timestamp_q)
-            #
-            # elif q != 'redcap_event_name':
-            #     print(f"missing question {q}")
+        # anti-join: mapped questions that are not in the questions list yet
+        standard_names = self.questionnaire_map.standard_question_name
+        is_missing = ~standard_names.isin(set(questions_list.get_question_names()))
+        missing_timestamps = standard_names[is_missing & standard_names.str.endswith('_timestamp', na=False)]
+
+        # questionnaire of the first map row of each question
+        first_rows = self.questionnaire_map.drop_duplicates('standard_question_name')
+        questionnaires = dict(zip(first_rows.standard_question_name, first_rows.questionnaire))
+
+        questions_list.extend([TimestampQuestion(variable_name=q, questionnaire=questionnaires[q])
+                               for q in missing_timestamps])
 
 
     def _expend_checkbox_questions(self, row, question_data):
@@ -226,7 +234,7 @@ class QuestionLoader:
             'ancestor': ancestor}
 
         if self.init_validator:
-            info["validator"] = question_type.validator(row)
+            info["validator"] = self.validator_factory.create(question_type.validator, row)
         return info
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from source.consts.data_files_paths import scoring_cache_path
+from source.data_etl.questionnaires_metadata.info_objects import ScoringInfo
+
+
+def fingerprint_scoring_info(scoring_info: ScoringInfo, missing_threshold: float = 0) -> str:
+    """
+    Stable digest of everything that affects a questionnaire's scores: aggregation, columns,
+    reversed columns, clusters, score range and the missing threshold.
+    """
+    clusters = scoring_info.clusters or {}
+    parts = (
+        getattr(scoring_info.questionnaire_name, "name", str(scoring_info.questionnaire_name)),
+        repr(scoring_info.aggregation_function),
+        list(scoring_info.columns),
+        list(scoring_info.reversed_columns or []),
+        [(name, list(items)) for name, items in clusters.items()],
+        scoring_info.min_score,
+        scoring_info.max_score,
+        missing_threshold,
+    )
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def hash_rows(values: np.ndarray) -> np.ndarray:
+    """One uint64 hash per row of an (rows x items) array."""
+    return pd.util.hash_pandas_object(pd.DataFrame(values), index=False).to_numpy()
+
+
+class ScoringCache:
+    """
+    Scores of previous runs, keyed by (ScoringInfo fingerprint, row id, hash of the row's input items).
+
+    Used by ScoringEngine.compute to recompute only the rows whose items changed and the
+    questionnaires whose scoring metadata changed.
+    """
+
+    hash_column = "_input_hash"
+
+    def __init__(self):
+        # fingerprint -> frame indexed by row id, holding the input hash and the score columns
+        self.entries: Dict[str, pd.DataFrame] = {}
+
+    def lookup(
+        self, fingerprint: str, row_ids: pd.Index, input_hashes: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Returns:
+            (reusable, scores) - `reusable` marks the rows whose cached scores are still valid;
+            `scores` holds the cached values for those rows (NaN elsewhere).
+        """
+        entry = self.entries.get(fingerprint)
+        if entry is None:
+            return np.zeros(len(row_ids), dtype=bool), {}
+
+        positions = entry.index.get_indexer(row_ids)
+        found = positions >= 0
+        # only rows present in the entry are read, so an empty entry is never indexed
+        reusable = found.copy()
+        reusable[found] = entry[self.hash_column].to_numpy()[positions[found]] == input_hashes[found]
+
+        scores = {}
+        for column in entry.columns.drop(self.hash_column):
+            values = np.full(len(row_ids), np.nan)
+            values[reusable] = entry[column].to_numpy(dtype=float)[positions[reusable]]
+            scores[column] = values
+        return reusable, scores
+
+    def store(self, fingerprint: str, row_ids: pd.Index, input_hashes: np.ndarray, scores: Dict[str, np.ndarray]):
+        entry = pd.DataFrame(scores, index=row_ids)
+        entry[self.hash_column] = input_hashes
+        self.entries[fingerprint] = entry
+
+    def prune(self, fingerprints):
+        """Drop the entries of scoring definitions that are no longer in use."""
+        keep = set(fingerprints)
+        self.entries = {fp: entry for fp, entry in self.entries.items() if fp in keep}
+
+    def save(self, path: str = scoring_cache_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = scoring_cache_path) -> "ScoringCache":
+        """Cache saved at `path`, or an empty cache when there is none."""
+        cache = cls()
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                cache.entries = pickle.load(f)
+        return cache
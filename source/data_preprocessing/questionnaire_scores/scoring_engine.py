@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from source.data_etl.questionnaires_metadata.info_objects import ScoresList, ScoringInfo
+from source.data_preprocessing.questionnaire_scores.scoring_cache import ScoringCache, fingerprint_scoring_info, \
+    hash_rows
+from source.data_preprocessing.questionnaire_scores.utils.questionnaire_scorer import QuestionnaireScorer
+
+
+class ScoringEngine:
+    """
+    Compute every questionnaire score of a ScoresList in a single pass over the data.
+
+    Behaviour:
+    - Builds one scorer per ScoringInfo from ``aggregation_function.scorer_class``; scores without
+      a scorer class (no scoring / not implemented yet) or without columns are skipped.
+    - Extracts all needed item columns once into a float matrix (missing columns -> NaN).
+      Each scorer aggregates column slices of that matrix; reversed items are reversed on the
+      slice only, so nothing is copied back and forth.
+    - Returns one frame (same index as the input) with all main scores and cluster subscores.
+      A score name used by more than one questionnaire is prefixed with the questionnaire name
+      for every questionnaire using it, so no output column depends on the ScoresList order.
+    - With a ScoringCache, only rows whose input items changed (and questionnaires whose scoring
+      metadata changed) are recomputed; everything else is taken from the cache.
+    """
+
+    def __init__(self, scores_list: ScoresList, missing_threshold: float = 0):
+        self.scores_list = scores_list
+        self.missing_threshold = missing_threshold
+        self.scoring_infos, self.scorers = self._build_scorers()
+        self.score_columns = self._get_output_columns()
+        self.fingerprints = [fingerprint_scoring_info(info, missing_threshold) for info in self.scoring_infos]
+        self.last_run_stats: Dict[str, int] = {}
+
+    @staticmethod
+    def get_score_name(scoring_info: ScoringInfo) -> str:
+        return getattr(scoring_info.questionnaire_name, "name", str(scoring_info.questionnaire_name))
+
+    def _build_scorer(self, scoring_info: ScoringInfo) -> QuestionnaireScorer | None:
+        scorer_class = getattr(scoring_info.aggregation_function, "scorer_class", None)
+        if scorer_class is None or not scoring_info.columns:
+            return None
+
+        return scorer_class(
+            name=self.get_score_name(scoring_info),
+            columns=scoring_info.columns,
+            reversed_columns=scoring_info.reversed_columns,
+            clusters=scoring_info.clusters,
+            min_score=scoring_info.min_score,
+            max_score=scoring_info.max_score,
+            missing_threshold=self.missing_threshold,
+        )
+
+    def _build_scorers(self):
+        scoring_infos, scorers = [], []
+        for scoring_info in self.scores_list.scores:
+            scorer = self._build_scorer(scoring_info)
+            if scorer is not None:
+                scoring_infos.append(scoring_info)
+                scorers.append(scorer)
+        return scoring_infos, scorers
+
+    @staticmethod
+    def get_scorer_items(scorer: QuestionnaireScorer) -> List[str]:
+        columns: Dict[str, None] = dict.fromkeys(scorer.columns)
+        for subscale_items in scorer.clusters.values():
+            columns.update(dict.fromkeys(subscale_items))
+        return list(columns)
+
+    @staticmethod
+    def get_scorer_score_columns(scorer: QuestionnaireScorer) -> List[str]:
+        """Score names produced by `scorer` (main score first, then its subscales)."""
+        return [f"{scorer.name}_score"] + list(scorer.clusters)
+
+    def _get_output_columns(self) -> List[Dict[str, str]]:
+        """
+        Per scorer, {score name: output column}. Names produced by more than one scorer are
+        prefixed with the scorer name everywhere.
+
+        Raises:
+            ValueError: when the output columns are still not unique (e.g. two scorers of the same
+                questionnaire, or a prefixed name equal to another score name).
+        """
+        score_names = [self.get_scorer_score_columns(scorer) for scorer in self.scorers]
+        counts = Counter(name for names in score_names for name in names)
+
+        output_columns = [
+            {name: f"{scorer.name}_{name}" if counts[name] > 1 else name for name in names}
+            for scorer, names in zip(self.scorers, score_names)
+        ]
+        all_columns = Counter(column for columns in output_columns for column in columns.values())
+        duplicated = sorted(column for column, count in all_columns.items() if count > 1)
+        if duplicated:
+            raise ValueError(f"ambiguous score columns: {duplicated}")
+        return output_columns
+
+    def get_item_columns(self) -> List[str]:
+        """All item columns needed by the scorers, in first-use order."""
+        columns: Dict[str, None] = {}
+        for scorer in self.scorers:
+            columns.update(dict.fromkeys(self.get_scorer_items(scorer)))
+        return list(columns)
+
+    def get_item_matrix(self, df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        items = df.reindex(columns=columns)
+        non_numeric = [c for c, dtype in items.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+        if non_numeric:
+            items[non_numeric] = items[non_numeric].apply(pd.to_numeric, errors="coerce")
+        return items.to_numpy(dtype=float)
+
+    def compute(
+        self,
+        df: pd.DataFrame,
+        cache: ScoringCache | None = None,
+        row_id_columns: Sequence[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Score frame with one column per main score / subscale, indexed like `df`.
+
+        With `cache`, rows are identified by `row_id_columns` (default: the index of `df`),
+        reused when their input items hash to the cached value, and the cache is updated in place.
+        """
+        item_columns = self.get_item_columns()
+        matrix = self.get_item_matrix(df, item_columns)
+        positions = {column: i for i, column in enumerate(item_columns)}
+        row_ids = self._get_row_ids(df, row_id_columns) if cache is not None else None
+
+        scores: Dict[str, np.ndarray] = {}
+        self.last_run_stats = {}
+        for scorer, fingerprint, output_columns in zip(self.scorers, self.fingerprints, self.score_columns):
+            if cache is None:
+                scorer_scores = scorer.compute_score_arrays(matrix, positions)
+                self.last_run_stats[scorer.name] = len(df)
+            else:
+                scorer_scores = self._compute_with_cache(scorer, fingerprint, matrix, positions, row_ids, cache)
+
+            for score_column, values in scorer_scores.items():
+                scores[output_columns[score_column]] = values
+
+        return pd.DataFrame(scores, index=df.index)
+
+    def _compute_with_cache(
+        self,
+        scorer: QuestionnaireScorer,
+        fingerprint: str,
+        matrix: np.ndarray,
+        positions: Dict[str, int],
+        row_ids: pd.Index,
+        cache: ScoringCache,
+    ) -> Dict[str, np.ndarray]:
+        input_hashes = hash_rows(matrix[:, [positions[c] for c in self.get_scorer_items(scorer)]])
+        reusable, scores = cache.lookup(fingerprint, row_ids, input_hashes)
+        stale = ~reusable
+
+        if stale.any():
+            stale_scores = scorer.compute_score_arrays(matrix[stale], positions)
+            for score_column, values in stale_scores.items():
+                column_scores = scores.get(score_column, np.full(len(row_ids), np.nan))
+                column_scores[stale] = values
+                scores[score_column] = column_scores
+
+        cache.store(fingerprint, row_ids, input_hashes, scores)
+        self.last_run_stats[scorer.name] = int(stale.sum())
+        return scores
+
+    @staticmethod
+    def _get_row_ids(df: pd.DataFrame, row_id_columns: Sequence[str] | None) -> pd.Index:
+        if row_id_columns:
+            row_ids = pd.MultiIndex.from_frame(df[list(row_id_columns)]) if len(row_id_columns) > 1 \
+                else pd.Index(df[row_id_columns[0]])
+        else:
+            row_ids = df.index
+        if not row_ids.is_unique:
+            raise ValueError("row ids must be unique to use the scoring cache")
+        return row_ids
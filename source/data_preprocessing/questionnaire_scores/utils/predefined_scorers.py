@@ -1,3 +1,6 @@
+import numpy as np
+import pandas as pd
+
 from source.data_preprocessing.questionnaire_scores.utils.questionnaire_scorer import QuestionnaireScorer
 
 
@@ -56,6 +59,9 @@ class SumScorer(QuestionnaireScorer):
     def _calculate_aggregated_score(self, df, columns):
         return df[columns].sum(axis=1, skipna=True)
 
+    def _aggregate_array(self, values):
+        return np.nansum(values, axis=1)
+
 
 class AverageScorer(QuestionnaireScorer):
     def __init__(self, **params):
@@ -64,6 +70,11 @@ class AverageScorer(QuestionnaireScorer):
     def _calculate_aggregated_score(self, df, columns):
         return df[columns].mean(axis=1, skipna=True)
 
+    def _aggregate_array(self, values):
+        counts = (~np.isnan(values)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nansum(values, axis=1) / counts
+
 
 class SingleItemScorer(QuestionnaireScorer):
     def __init__(self, **params):
@@ -72,6 +83,9 @@ class SingleItemScorer(QuestionnaireScorer):
     def _calculate_aggregated_score(self, df, columns):
         return df[columns[0]]
 
+    def _aggregate_array(self, values):
+        return values[:, 0]
+
 
 class CSSRSScorer(QuestionnaireScorer):
     """
@@ -85,8 +99,13 @@ class CSSRSScorer(QuestionnaireScorer):
         1 = low risk
         2 = moderate risk
         3 = high risk
+
+    Clusters are treated as time-point families of the same six items (e.g. lifetime /
+    2 weeks / last visit in c_ssrs_intake) and are scored together in one pass.
     """
 
+    n_items = 6
+
     def __init__(self, **params):
         """
         Parameters should at least include:
@@ -97,38 +116,57 @@ class CSSRSScorer(QuestionnaireScorer):
 
     def _calculate_aggregated_score(self, df, columns):
         # Map columns positionally so the scorer is robust to exact column names
-        if len(columns) < 6:
-            raise ValueError(
-                "CSSRSScorer expects at least 6 columns corresponding to c_ssrs_1..c_ssrs_6."
-            )
+        self._check_columns(columns)
+        codes = self._encode_items(df[list(columns[:self.n_items])].to_numpy())
+        return pd.Series(self._risk_levels(codes).astype(float), index=df.index)
 
-        c1_col, c2_col, c3_col, c4_col, c5_col, c6_col = columns[:6]
+    def _aggregate_array(self, values):
+        self._check_columns(range(values.shape[1]))
+        return self._risk_levels(self._encode_items(values[:, :self.n_items])).astype(float)
 
-        # Start with no-risk = 0
-        scores = df.index.to_series().map(lambda _: 0).astype(float)
+    def _calculate_subscales(self, items):
+        if not self.clusters:
+            return {}
+        timepoint_scores = self.compute_timepoint_scores(items)
+        return {name: timepoint_scores[name] for name in timepoint_scores.columns}
 
-        # High risk (3): any of items 4–6 endorsed
-        high_risk_mask = df[[c4_col, c5_col, c6_col]].eq(1).any(axis=1)
-        scores.loc[high_risk_mask] = 3
+    def compute_timepoint_scores(self, df, families=None):
+        """
+        Risk level per time-point family ({score name: six item columns}, default: the clusters),
+        computed with a single np.select over all families. The missing threshold is applied
+        per family, as for any subscale.
+        """
+        families = dict(self.clusters if families is None else families)
+        for family_columns in families.values():
+            self._check_columns(family_columns)
 
-        # Moderate risk (2): item 3 = 1 and items 4–6 = 0 (and not already high risk)
-        moderate_risk_mask = (
-            ~high_risk_mask
-            & (df[c3_col] == 1)
-            & df[[c4_col, c5_col, c6_col]].eq(0).all(axis=1)
-        )
-        scores.loc[moderate_risk_mask] = 2
-
-        # Low risk (1): item 1 or 2 = 1 and items 3–6 = 0 (and not already higher risk)
-        low_risk_mask = (
-            ~high_risk_mask
-            & ~moderate_risk_mask
-            & ((df[c1_col] == 1) | (df[c2_col] == 1))
-            & df[[c3_col, c4_col, c5_col, c6_col]].eq(0).all(axis=1)
-        )
-        scores.loc[low_risk_mask] = 1
+        columns = [c for family_columns in families.values() for c in list(family_columns)[:self.n_items]]
+        codes = self._encode_items(df[columns].to_numpy()).reshape(len(df), len(families), self.n_items)
+        scores = pd.DataFrame(self._risk_levels(codes).astype(float), index=df.index, columns=list(families))
 
-        # Remaining rows (not captured above) stay as 0 (no risk)
+        for name, family_columns in families.items():
+            missing_ratio = self._calculate_missing_ratio(df, list(family_columns))
+            scores[name] = scores[name].mask(missing_ratio > self.missing_threshold)
         return scores
 
+    def _check_columns(self, columns):
+        if len(columns) < self.n_items:
+            raise ValueError(
+                "CSSRSScorer expects at least 6 columns corresponding to c_ssrs_1..c_ssrs_6."
+            )
 
+    @staticmethod
+    def _encode_items(values):
+        """int8 codes per answer: 1 = endorsed, 0 = denied, -1 = missing / anything else."""
+        values = np.asarray(values)
+        return np.where(values == 1, 1, np.where(values == 0, 0, -1)).astype(np.int8)
+
+    @staticmethod
+    def _risk_levels(codes):
+        """(..., 6) item codes -> (...) risk levels; np.select keeps the highest matching level."""
+        endorsed = codes == 1
+        denied = codes == 0
+        high_risk = endorsed[..., 3:6].any(axis=-1)  # any of items 4-6 endorsed
+        moderate_risk = endorsed[..., 2] & denied[..., 3:6].all(axis=-1)  # item 3, items 4-6 = 0
+        low_risk = (endorsed[..., 0] | endorsed[..., 1]) & denied[..., 2:6].all(axis=-1)  # item 1/2, items 3-6 = 0
+        return np.select([high_risk, moderate_risk, low_risk], [3, 2, 1], default=0).astype(np.int8)
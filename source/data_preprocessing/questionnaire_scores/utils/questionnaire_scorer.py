@@ -47,52 +47,120 @@ class QuestionnaireScorer:
         """
         Compute main score and subscale scores for this questionnaire.
 
+        `df` is never modified: reversed items are computed on a transient frame holding
+        only this questionnaire's items, and the scores are concatenated to `df` without
+        copying its columns.
+
         Returns:
             (updated_df, score_columns)
         """
-        df = df.copy()
         main_score_column = self._get_main_score_column()
+        items = self._reverse_items(self._get_items(df))
 
-        # Work on a reversed copy, compute all scores, then restore original values.
-        df = self._reverse_items(df)
-        df[main_score_column] = self._calculate_aggregated_score(df, self.columns)
+        scores = {main_score_column: self._calculate_aggregated_score(items, self.columns)}
         if self.missing_threshold > 0:
-            df = self._apply_missing_threshold(df, main_score_column, self.columns)
-        df, subscale_columns = self._calculate_subscales(df)
-        df = self._reverse_items(df)  # return items to original coding
+            scores[main_score_column] = self._apply_missing_threshold(
+                items, scores[main_score_column], self.columns
+            )
+        scores.update(self._calculate_subscales(items))
+
+        scores_df = pd.DataFrame(scores, index=df.index)
+        existing_score_columns = [c for c in scores_df.columns if c in df.columns]
+        if existing_score_columns:
+            df = df.drop(columns=existing_score_columns)
+        df = pd.concat([df, scores_df], axis=1, copy=False)
+
+        return df, list(scores_df.columns)
 
-        return df, [main_score_column] + subscale_columns
+    def _get_items(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        New frame with the item columns this scorer reads (main columns + cluster items).
+        """
+        needed = dict.fromkeys(self.columns)
+        for subscale_items in self.clusters.values():
+            needed.update(dict.fromkeys(subscale_items))
+        # reindex (rather than df[cols]) returns a standalone frame, safe to reverse in place
+        return df.reindex(columns=[c for c in needed if c in df.columns])
 
-    def _reverse_items(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _reverse_items(self, items: pd.DataFrame) -> pd.DataFrame:
         """
-        Reverse-score selected items in-place (1 <-> max, etc.).
+        Reverse-score selected items (1 <-> max, etc.) on the transient items frame.
         """
         if not self.reversed_columns:
-            return df
+            return items
 
         # Operate only on columns that actually exist in the DataFrame
-        existing_cols = [c for c in self.reversed_columns if c in df.columns]
+        existing_cols = [c for c in self.reversed_columns if c in items.columns]
         if not existing_cols:
-            return df
+            return items
 
-        df[existing_cols] = self.max_score - df[existing_cols] + self.min_score
-        return df
+        items[existing_cols] = self.max_score - items[existing_cols] + self.min_score
+        return items
 
     def _apply_missing_threshold(
-        self, df: pd.DataFrame, score_column: str, columns: Iterable[str]
-    ) -> pd.DataFrame:
-        missing_ratio_column = self._get_missing_ratio_column(score_column)
-        df[missing_ratio_column] = self._calculate_missing_ratio(df, list(columns))
-        df.loc[df[missing_ratio_column] > self.missing_threshold, score_column] = np.nan
-        return df.drop(columns=missing_ratio_column)
-
-    def _calculate_subscales(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
-        subscale_columns: List[str] = []
+        self, items: pd.DataFrame, scores: pd.Series, columns: Iterable[str]
+    ) -> pd.Series:
+        missing_ratio = self._calculate_missing_ratio(items, list(columns))
+        return scores.mask(missing_ratio > self.missing_threshold)
+
+    def _calculate_subscales(self, items: pd.DataFrame) -> Dict[str, pd.Series]:
+        subscales: Dict[str, pd.Series] = {}
         for subscale_name, subscale_items in self.clusters.items():
-            df[subscale_name] = self._calculate_aggregated_score(df, subscale_items)
-            df = self._apply_missing_threshold(df, subscale_name, subscale_items)
-            subscale_columns.append(subscale_name)
-        return df, subscale_columns
+            subscale_scores = self._calculate_aggregated_score(items, subscale_items)
+            subscales[subscale_name] = self._apply_missing_threshold(items, subscale_scores, subscale_items)
+        return subscales
+
+    def compute_score_arrays(
+        self, matrix: np.ndarray, positions: Dict[str, int]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Array counterpart of compute_scores, used by the ScoringEngine.
+
+        `matrix` holds item values (rows x items, NaN = missing) and `positions` maps
+        item name -> column of `matrix`. Reversed items are reversed on the extracted
+        slice only, so `matrix` itself is never modified.
+
+        Returns:
+            {score_column: scores}
+        """
+        scores = {
+            self._get_main_score_column(): self._score_array(
+                matrix, positions, self.columns, apply_threshold=self.missing_threshold > 0
+            )
+        }
+        for subscale_name, subscale_items in self.clusters.items():
+            scores[subscale_name] = self._score_array(
+                matrix, positions, subscale_items, apply_threshold=True
+            )
+        return scores
+
+    def _score_array(
+        self,
+        matrix: np.ndarray,
+        positions: Dict[str, int],
+        columns: Sequence[str],
+        apply_threshold: bool,
+    ) -> np.ndarray:
+        columns = list(columns)
+        values = matrix[:, [positions[c] for c in columns]]  # fancy indexing -> a copy
+        reversed_mask = np.array([c in self.reversed_columns for c in columns], dtype=bool)
+        if reversed_mask.any():
+            values[:, reversed_mask] = self.max_score - values[:, reversed_mask] + self.min_score
+
+        scores = self._aggregate_array(values)
+        if apply_threshold:
+            missing_ratio = np.isnan(values).sum(axis=1) / len(columns)
+            scores = np.where(missing_ratio > self.missing_threshold, np.nan, scores)
+        return scores
+
+    def _aggregate_array(self, values: np.ndarray) -> np.ndarray:
+        """
+        Aggregate an (rows x items) array. Falls back to `_calculate_aggregated_score`;
+        subclasses override it with a NumPy implementation.
+        """
+        columns = list(range(values.shape[1]))
+        scores = self._calculate_aggregated_score(pd.DataFrame(values, columns=columns), columns)
+        return scores.to_numpy(dtype=float)
 
     @staticmethod
     def _calculate_missing_ratio(df: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
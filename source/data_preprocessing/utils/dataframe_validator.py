@@ -0,0 +1,65 @@
+from typing import Dict, List
+
+import pandas as pd
+
+from source.data_etl.questionnaires_metadata.info_objects import QuestionsList, QuestionInfo
+
+
+class DataFrameValidator:
+    """
+    Validate a whole export against the validators of a QuestionsList.
+
+    Behaviour:
+    - Every column with a known question (and validator) is validated with the validator's
+      vectorized ``validate_series``; columns without metadata are skipped.
+    - Missing values are counted separately and are never reported as invalid.
+    """
+
+    report_columns = ['question_type', 'n_values', 'n_missing', 'n_invalid', 'invalid_ratio']
+
+    def __init__(self, questions_list: QuestionsList):
+        self.questions_list = questions_list
+
+    def get_validated_questions(self, df: pd.DataFrame) -> Dict[str, QuestionInfo]:
+        questions = {}
+        for col in df.columns:
+            if not isinstance(col, str):
+                continue
+            question = self.questions_list.get_by_variable_name(col)
+            if question is not None and question.validator is not None:
+                questions[col] = question
+        return questions
+
+    def get_unknown_columns(self, df: pd.DataFrame) -> List[str]:
+        validated = self.get_validated_questions(df)
+        return [col for col in df.columns if col not in validated]
+
+    def invalid_mask(self, df: pd.DataFrame) -> pd.DataFrame:
+        """True where a non-missing value fails the validator of its column."""
+        masks = {
+            col: df[col].notna() & ~question.validator.validate_series(df[col])
+            for col, question in self.get_validated_questions(df).items()
+        }
+        return pd.DataFrame(masks, index=df.index)
+
+    def validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per-column report (index = column name) with the question type and the number of
+        present, missing and invalid values.
+        """
+        records = []
+        for col, question in self.get_validated_questions(df).items():
+            series = df[col]
+            present = series.notna()
+            n_values = int(present.sum())
+            n_invalid = int((present & ~question.validator.validate_series(series)).sum())
+            records.append({
+                'column': col,
+                'question_type': question.question_type.label,
+                'n_values': n_values,
+                'n_missing': len(series) - n_values,
+                'n_invalid': n_invalid,
+                'invalid_ratio': n_invalid / n_values if n_values else 0.0,
+            })
+
+        return pd.DataFrame.from_records(records, columns=['column'] + self.report_columns).set_index('column')
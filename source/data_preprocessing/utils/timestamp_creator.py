@@ -1,6 +1,11 @@
+import warnings
+
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
 
-from source.consts.standard_names import TIMESTAMP_COLUMN_NAME
+from source.consts.standard_names import TIMESTAMP_COLUMN_NAME, PATIENT_ID_COLUMN, RedcapEventName
+from source.data_etl.questionnaires_metadata.info_objects import QuestionnairesList
 
 
 class TimestampCreator:
@@ -12,8 +17,22 @@ class TimestampCreator:
     - Converts each of these columns to ``datetime`` (invalid values become ``NaT``).
     - For each row, takes the **earliest (minimum) non-null timestamp** across those
       ``*_timestamp`` columns and stores it in ``self.timestamp_column``.
+    - Each distinct value is parsed once per column. The date format is sniffed from a sample of
+      the column and the whole column is parsed with it; only values that do not match the sniffed
+      format go through ``convert_to_datetime``. With a day-first format, values whose day is 12 or
+      less also go through it, so ambiguous dates keep its month-first reading.
+    - ``get_completion_times`` returns the same timestamps as a long table: one row per
+      (patient, event, questionnaire) with the completion time, its order within the visit and
+      the time elapsed since the first questionnaire of the visit.
     """
 
+    questionnaire_column = "questionnaire"
+    completion_time_column = "completion_time"
+    MIN_VALID_TIMESTAMP = pd.Timestamp("2000-01-01")
+
+    # number of distinct values used to sniff a column's format (they must all agree)
+    format_sample_size = 20
+
     def __init__(self, timestamp_column: str = TIMESTAMP_COLUMN_NAME):
         self.timestamp_column = timestamp_column
 
@@ -32,16 +51,125 @@ class TimestampCreator:
             return df
 
         # Ensure all candidate columns are proper datetimes
-        for col in timestamp_columns:
-            df[col] = df[col].apply(self.convert_to_datetime)
-
-        df[timestamp_columns] = df[timestamp_columns].mask(df[timestamp_columns] < pd.Timestamp("2000-01-01"))
+        df[timestamp_columns] = self.parse_timestamp_columns(df, timestamp_columns)
 
         # For each row, choose the earliest non-null timestamp across all *_timestamp columns
         df[self.timestamp_column] = df[timestamp_columns].min(axis=1)
 
         return df
 
+    def parse_timestamp_columns(self, df: pd.DataFrame, timestamp_columns) -> pd.DataFrame:
+        """Parsed ``timestamp_columns`` of ``df``; values before 2000 are set to NaT."""
+        parsed = pd.DataFrame({col: self.convert_column(df[col]) for col in timestamp_columns}, index=df.index)
+        return parsed.mask(parsed < self.MIN_VALID_TIMESTAMP)
+
+    @staticmethod
+    def get_timestamp_questionnaires(questionnaires_list: QuestionnairesList) -> dict:
+        """``*_timestamp`` item -> name of the (first) questionnaire that lists it in its timestamp_items."""
+        timestamp_questionnaires = {}
+        for questionnaire in questionnaires_list.questionnaires:
+            for item in questionnaire.timestamp_items:
+                if item.endswith("_timestamp"):
+                    timestamp_questionnaires.setdefault(item, questionnaire.name)
+        return timestamp_questionnaires
+
+    def get_completion_times(
+        self,
+        df: pd.DataFrame,
+        questionnaires_list: QuestionnairesList,
+        id_columns=(PATIENT_ID_COLUMN, RedcapEventName),
+    ) -> pd.DataFrame:
+        """
+        Long table of questionnaire completion times.
+
+        Columns: ``id_columns``, questionnaire, completion_time, order (1 = first questionnaire of
+        the visit), time_from_visit_start, visit_start, visit_end and visit_span. A visit is one
+        combination of ``id_columns``; when a questionnaire has several timestamp columns (or rows)
+        in a visit, the earliest timestamp is kept.
+        """
+        id_columns = list(id_columns)
+        timestamp_questionnaires = self.get_timestamp_questionnaires(questionnaires_list)
+        timestamp_columns = [col for col in df.columns if col in timestamp_questionnaires]
+        result_columns = id_columns + [self.questionnaire_column, self.completion_time_column]
+
+        if not timestamp_columns:
+            completion_times = pd.DataFrame(columns=result_columns)
+            completion_times[self.completion_time_column] = pd.to_datetime(completion_times[self.completion_time_column])
+        else:
+            values = self.parse_timestamp_columns(df, timestamp_columns).to_numpy(dtype="datetime64[ns]")
+            rows, cols = np.nonzero(~np.isnat(values))
+            completion_times = df[id_columns].iloc[rows].reset_index(drop=True)
+            completion_times[self.questionnaire_column] = np.array(
+                [timestamp_questionnaires[col] for col in timestamp_columns], dtype=object)[cols]
+            completion_times[self.completion_time_column] = values[rows, cols]
+            completion_times = completion_times.groupby(
+                id_columns + [self.questionnaire_column], sort=False, dropna=False, as_index=False
+            )[self.completion_time_column].min()
+
+        return self.add_visit_durations(completion_times, id_columns)
+
+    def add_visit_durations(self, completion_times: pd.DataFrame, id_columns) -> pd.DataFrame:
+        completion_times = completion_times.sort_values(
+            id_columns + [self.completion_time_column], kind="stable", ignore_index=True)
+        visits = completion_times.groupby(id_columns, sort=False, dropna=False)[self.completion_time_column]
+
+        completion_times["order"] = visits.cumcount() + 1
+        completion_times["visit_start"] = visits.transform("min")
+        completion_times["visit_end"] = visits.transform("max")
+        completion_times["visit_span"] = completion_times["visit_end"] - completion_times["visit_start"]
+        completion_times["time_from_visit_start"] = \
+            completion_times[self.completion_time_column] - completion_times["visit_start"]
+        return completion_times
+
+    def convert_column(self, series: pd.Series) -> pd.Series:
+        """
+        Same result as ``series.apply(self.convert_to_datetime)``, parsing every distinct value once.
+        """
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return series.copy()
+
+        codes, uniques = pd.factorize(series)
+        # the extra trailing NaT is picked up by the missing values (code -1)
+        parsed = pd.Series(self.parse_values(pd.Series(uniques, dtype=object)) + [pd.NaT])
+        return pd.Series(parsed.to_numpy()[codes], index=series.index, name=series.name)
+
+    def parse_values(self, values: pd.Series) -> list:
+        parsed = [pd.NaT] * len(values)
+
+        is_str = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        strings = values[is_str]
+        # numeric-like strings are never dates
+        date_strings = strings[pd.to_numeric(strings, errors="coerce").isna().to_numpy()]
+
+        leftover = ~is_str
+        # unsniffable columns still get a vectorized pass for ISO 8601 strings
+        date_format = self.sniff_format(date_strings) or "ISO8601"
+        fast = pd.to_datetime(date_strings, format=date_format, errors="coerce")
+        if self.is_day_first(date_format):
+            # convert_to_datetime reads "05/06/2023" month first; only a day above 12 is unambiguous
+            fast = fast.where(fast.dt.day > 12)
+        for position, timestamp in zip(date_strings.index[fast.notna()], fast[fast.notna()]):
+            parsed[position] = timestamp
+        leftover[date_strings.index[fast.isna()]] = True
+
+        for position in np.flatnonzero(leftover):
+            parsed[position] = self.convert_to_datetime(values.iloc[position])
+        return parsed
+
+    def sniff_format(self, date_strings: pd.Series):
+        """The format shared by a sample of the strings, or None if they do not agree."""
+        if date_strings.empty:
+            return None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            formats = {guess_datetime_format(value) for value in date_strings.iloc[:self.format_sample_size]}
+        return formats.pop() if len(formats) == 1 else None
+
+    @staticmethod
+    def is_day_first(date_format: str) -> bool:
+        day, month = date_format.find("%d"), date_format.find("%m")
+        return 0 <= day < month
+
     @staticmethod
     def convert_to_datetime(date_str):
 
@@ -69,4 +197,11 @@ class TimestampCreator:
         is_date = 'date' in col_name
         return is_timestamp or is_date
 
+    @staticmethod
+    def is_datetime_columns(col_names: pd.Series) -> pd.Series:
+        """Vectorized ``is_datetime_column`` over a Series of column names."""
+        is_timestamp = col_names.str.contains('timestamp', regex=False)
+        is_date = col_names.str.contains('date', regex=False)
+        return is_timestamp | is_date
+
 
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from source.utils.question_types.textual_question_type import normalize_series, levenshtein_distance
+
+
+class QuestionMatcher:
+    """
+    Top-k fuzzy matching of question labels between two data dictionaries
+    (e.g. SteppedCare items -> ImmiRisk items) without scoring all pairs.
+
+    Behaviour:
+    - Both sides are normalized once (normalize_series) and split into word tokens and
+      character n-grams (padded, so word boundaries count).
+    - The target side is held in inverted indexes (gram -> target positions). For a query, the
+      shared token / n-gram counts with every target come from one bincount over the postings of
+      its grams, which gives the token Jaccard (same as token_set_jaccard) and the n-gram Jaccard.
+    - Targets sharing no token and fewer than `min_shared_ngrams` n-grams are never candidates.
+      The best `shortlist` candidates by the two Jaccards are rescored with the edit ratio
+      (levenshtein_distance), and the final score is the mean of the three similarities.
+    """
+
+    result_columns = ['query_id', 'query_label', 'candidate_id', 'candidate_label', 'rank', 'score',
+                      'token_jaccard', 'ngram_jaccard', 'edit_ratio']
+
+    def __init__(self, target_labels: pd.Series, ngram_size: int = 3, min_shared_ngrams: int = 2):
+        """
+        Args:
+            target_labels: labels to match against, indexed by their ids (e.g. variable names).
+        """
+        self.ngram_size = ngram_size
+        self.min_shared_ngrams = min_shared_ngrams
+
+        self.target_ids = target_labels.index.to_numpy()
+        self.target_labels = target_labels.to_numpy(dtype=object)
+        self.target_texts = normalize_series(target_labels).to_numpy(dtype=object)
+
+        self.token_index, self.token_counts = self._build_index([self.get_tokens(t) for t in self.target_texts])
+        self.ngram_index, self.ngram_counts = self._build_index([self.get_ngrams(t) for t in self.target_texts])
+
+    @staticmethod
+    def get_tokens(text: str) -> set:
+        return set(text.split())
+
+    def get_ngrams(self, text: str) -> set:
+        if not text:
+            return set()
+        padded = f" {text} "
+        n = self.ngram_size
+        return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+    def _build_index(self, gram_sets: List[set]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        postings = defaultdict(list)
+        for position, grams in enumerate(gram_sets):
+            for gram in grams:
+                postings[gram].append(position)
+        index = {gram: np.array(positions, dtype=np.int64) for gram, positions in postings.items()}
+        sizes = np.array([len(grams) for grams in gram_sets], dtype=np.int64)
+        return index, sizes
+
+    def _shared_counts(self, grams: set, index: Dict[str, np.ndarray]) -> np.ndarray:
+        hits = [index[gram] for gram in grams if gram in index]
+        if not hits:
+            return np.zeros(len(self.target_ids), dtype=np.int64)
+        return np.bincount(np.concatenate(hits), minlength=len(self.target_ids))
+
+    @staticmethod
+    def _jaccard(shared: np.ndarray, query_size: int, target_sizes: np.ndarray) -> np.ndarray:
+        union = query_size + target_sizes - shared
+        return np.divide(shared, union, out=np.zeros(len(shared)), where=union > 0)
+
+    def _edit_ratio(self, query_text: str, candidate_text: str) -> float:
+        longest = max(len(query_text), len(candidate_text))
+        if not longest:
+            return 0.0
+        return 1 - levenshtein_distance(query_text, candidate_text) / longest
+
+    def match_one(self, query_text: str, top_k: int = 5, shortlist: int = 20) -> List[Tuple[int, float, float, float]]:
+        """(target position, token jaccard, n-gram jaccard, edit ratio) of the best candidates of a normalized label."""
+        tokens, ngrams = self.get_tokens(query_text), self.get_ngrams(query_text)
+        shared_tokens = self._shared_counts(tokens, self.token_index)
+        shared_ngrams = self._shared_counts(ngrams, self.ngram_index)
+
+        candidates = np.flatnonzero((shared_tokens > 0) | (shared_ngrams >= self.min_shared_ngrams))
+        if not len(candidates):
+            return []
+
+        token_jaccard = self._jaccard(shared_tokens[candidates], len(tokens), self.token_counts[candidates])
+        ngram_jaccard = self._jaccard(shared_ngrams[candidates], len(ngrams), self.ngram_counts[candidates])
+        blocking_score = token_jaccard + ngram_jaccard
+        if len(candidates) > shortlist:
+            best = np.argpartition(-blocking_score, shortlist - 1)[:shortlist]
+        else:
+            best = np.arange(len(candidates))
+
+        scored = []
+        for i in best:
+            position = candidates[i]
+            edit_ratio = self._edit_ratio(query_text, self.target_texts[position])
+            scored.append((position, token_jaccard[i], ngram_jaccard[i], edit_ratio))
+        # ties keep the target order, so results are deterministic
+        scored.sort(key=lambda item: (-(item[1] + item[2] + item[3]), item[0]))
+        return scored[:top_k]
+
+    def match(self, query_labels: pd.Series, top_k: int = 5, shortlist: int = 20) -> pd.DataFrame:
+        """
+        Top-k candidates per query label (indexed by the query ids), one row per (query, candidate),
+        ranked from 1 by the mean of token Jaccard, n-gram Jaccard and edit ratio.
+        """
+        query_texts = normalize_series(query_labels).to_numpy(dtype=object)
+        records = []
+        for query_id, query_label, query_text in zip(query_labels.index, query_labels.to_numpy(dtype=object),
+                                                     query_texts):
+            for rank, (position, token_jaccard, ngram_jaccard, edit_ratio) in enumerate(
+                    self.match_one(query_text, top_k, shortlist), 1):
+                records.append({
+                    'query_id': query_id,
+                    'query_label': query_label,
+                    'candidate_id': self.target_ids[position],
+                    'candidate_label': self.target_labels[position],
+                    'rank': rank,
+                    'score': (token_jaccard + ngram_jaccard + edit_ratio) / 3,
+                    'token_jaccard': token_jaccard,
+                    'ngram_jaccard': ngram_jaccard,
+                    'edit_ratio': edit_ratio,
+                })
+        return pd.DataFrame.from_records(records, columns=self.result_columns)
+
+
+def propose_stepped_care_renames(stepped_dict: pd.DataFrame, immi_dict: pd.DataFrame, top_k: int = 3) -> pd.DataFrame:
+    """
+    stepped_care_column_renames_map.csv-style proposals from the two REDCap data dictionaries:
+    every SteppedCare field gets its top-k ImmiRisk fields by the similarity of its label followed by
+    its variable name (words split on '_'), so renamed labels of the same item still line up.
+    match_type is 'Simple' when the variable names are equal, otherwise 'Fuzzy'.
+    """
+    name_col, form_col, label_col = 'Variable / Field Name', 'Form Name', 'Field Label'
+    immi_dict = immi_dict.drop_duplicates(name_col)
+    stepped_dict = stepped_dict.drop_duplicates(name_col)
+
+    def get_match_text(data_dict: pd.DataFrame) -> pd.Series:
+        labels = data_dict.set_index(name_col)[label_col].fillna('')
+        return labels + ' ' + labels.index.str.replace('_', ' ')
+
+    matcher = QuestionMatcher(get_match_text(immi_dict))
+    matches = matcher.match(get_match_text(stepped_dict), top_k=top_k)
+
+    immi_forms = immi_dict.set_index(name_col)[form_col]
+    stepped_forms = stepped_dict.set_index(name_col)[form_col]
+    return pd.DataFrame({
+        'questionnaire': matches.candidate_id.map(immi_forms).to_numpy(),
+        'standard_question_name': matches.candidate_id.to_numpy(),
+        'stepped_care_name': matches.query_id.to_numpy(),
+        'match_type': np.where(matches.candidate_id == matches.query_id, 'Simple', 'Fuzzy'),
+        'orig_step_name': matches.query_id.map(stepped_forms).to_numpy(),
+        'rank': matches['rank'].to_numpy(),
+        'score': matches.score.round(4).to_numpy(),
+    })
+
+
+if __name__ == "__main__":
+    import time
+
+    from source.consts.data_files_paths import stepped_data_dict, DataDictionary_path_df
+
+    stepped = pd.read_csv(stepped_data_dict)
+    immi = pd.read_csv(DataDictionary_path_df)
+    start = time.perf_counter()
+    proposals = propose_stepped_care_renames(stepped, immi)
+    elapsed = time.perf_counter() - start
+    print(f"{len(stepped)} x {len(immi)} items -> {len(proposals)} proposals in {elapsed:.2f}s")
+    print(proposals[proposals['rank'] == 1].head(20).to_string())
@@ -1,5 +1,39 @@
 import pandas as pd
 import re
+from functools import lru_cache
+
+
+class FrozenChoices(dict):
+    """Read-only {value: label} dict, shared by every question with the same raw choice string."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("parsed choices are shared between questions and cannot be modified")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenChoices, (dict(self),)
+
+
+EMPTY_CHOICES = FrozenChoices()
+
+
+@lru_cache(maxsize=None)
+def parse_choices(raw_choices: str) -> FrozenChoices:
+    """
+    Parse a REDCap choice string ("0, No | 1, Yes") into {value: label}.
+    Memoized by the raw string, so a scale shared across questionnaires is parsed once per process.
+    """
+    choices_dict = {}
+    choices = re.split(r'\s*\|\s*', raw_choices)
+    for choice in choices:
+        parts = choice.split(',', 1)
+        if len(parts) == 2:
+            key, val = parts
+            key = int(key.strip())
+            val = val.strip()
+            choices_dict[key] = val
+    return FrozenChoices(choices_dict)
 
 
 class MultipleChoiceLoader:
@@ -24,20 +58,12 @@ class MultipleChoiceLoader:
         self.choices_dict = self._get_choices_dict()
 
     def _get_choices_dict(self):
-        choices_dict = {}
         raw_choices = self.row[self.choices_col]
 
         # parse choices
-        if not pd.isna(self.row[self.choices_col]):
-            choices = re.split(r'\s*\|\s*', raw_choices)
-            for choice in choices:
-                parts = choice.split(',', 1)
-                if len(parts) == 2:
-                    key, val = parts
-                    key = int(key.strip())
-                    val = val.strip()
-                    choices_dict[key] = val
-        return choices_dict
+        if pd.isna(raw_choices):
+            return EMPTY_CHOICES
+        return parse_choices(raw_choices)
 
 
     def get_radio_type_classification(self):
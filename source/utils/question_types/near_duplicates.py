@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import zlib
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from source.data_etl.questionnaires_metadata.info_objects import QuestionsList
+from source.utils.question_types.textual_question_type import normalize_series
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 (path halving, union by size)."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+
+
+class NearDuplicateFinder:
+    """
+    Clusters of near-identical question texts (mother / father / child variants, the same item
+    in both projects) over a QuestionsList, without comparing all pairs.
+
+    Behaviour:
+    - question_text is normalized with normalize_for_match (through normalize_series) and cut
+      into padded character shingles; empty texts are never clustered.
+    - Every text gets a MinHash signature of `bands * rows` universal hashes of its shingles.
+      Texts whose signatures agree on all rows of at least one band land in the same LSH bucket.
+    - Bucket members are verified against the first member of their bucket with the exact shingle
+      Jaccard; pairs at or above `threshold` are merged with union-find, so a cluster may chain
+      items that are only transitively similar.
+    - Hashes are seeded (crc32 shingles, fixed `seed`), so clusters are the same on every run.
+    """
+
+    cluster_columns = ['cluster_id', 'variable_name', 'questionnaire_name', 'project_source', 'question_text',
+                       'cluster_size', 'representative']
+
+    def __init__(self, threshold: float = 0.8, shingle_size: int = 4, bands: int = 16, rows: int = 4,
+                 seed: int = 0):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = rows
+
+        rng = np.random.default_rng(seed)
+        num_perm = bands * rows
+        self.hash_a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.hash_b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def get_shingles(self, text: str) -> set:
+        if not text:
+            return set()
+        padded = f" {text} "
+        n = self.shingle_size
+        return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+    def get_signatures(self, shingle_sets: List[set]) -> np.ndarray:
+        """(texts x bands*rows) MinHash matrix; every text needs at least one shingle."""
+        hashes = [np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64) % MERSENNE_PRIME
+                  for shingles in shingle_sets]
+        values = np.concatenate(hashes)
+        starts = np.cumsum([0] + [len(h) for h in hashes[:-1]])
+
+        signatures = np.empty((len(hashes), len(self.hash_a)), dtype=np.uint64)
+        for k, (a, b) in enumerate(zip(self.hash_a, self.hash_b)):
+            signatures[:, k] = np.minimum.reduceat((a * values + b) % MERSENNE_PRIME, starts)
+        return signatures
+
+    def get_candidate_pairs(self, signatures: np.ndarray) -> np.ndarray:
+        """Unique (first bucket member, other member) pairs over all LSH bands."""
+        pairs = []
+        for band in range(self.bands):
+            band_rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            _, buckets = np.unique(band_rows, axis=0, return_inverse=True)
+            buckets = buckets.ravel()
+            order = np.argsort(buckets, kind="stable")
+            sorted_buckets = buckets[order]
+            is_first = np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]]
+            first_member = order[np.flatnonzero(is_first)[np.cumsum(is_first) - 1]]
+            others = ~is_first
+            pairs.append(np.column_stack([first_member[others], order[others]]))
+
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(pairs), axis=0)
+
+    @staticmethod
+    def _jaccard(a: set, b: set) -> float:
+        return len(a & b) / len(a | b)
+
+    def find_clusters(self, questions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Args:
+            questions: one row per question with variable_name, questionnaire_name, project_source
+                and question_text (e.g. QuestionsList.get_table().df).
+
+        Returns:
+            One row per clustered question (clusters of two or more only), ordered by cluster.
+            representative is the first variable of the cluster in the order of `questions`.
+        """
+        texts = normalize_series(questions['question_text'].fillna('')).to_numpy(dtype=object)
+        has_text = np.flatnonzero([bool(text) for text in texts])
+        shingle_sets = [self.get_shingles(texts[i]) for i in has_text]
+        if not shingle_sets:
+            return pd.DataFrame(columns=self.cluster_columns)
+
+        signatures = self.get_signatures(shingle_sets)
+        union_find = UnionFind(len(has_text))
+        for i, j in self.get_candidate_pairs(signatures):
+            if self._jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold:
+                union_find.union(int(i), int(j))
+
+        roots = np.array([union_find.find(i) for i in range(len(has_text))])
+        _, cluster_codes, cluster_sizes = np.unique(roots, return_inverse=True, return_counts=True)
+        clustered = cluster_sizes[cluster_codes] > 1
+
+        rows = questions.iloc[has_text[clustered]]
+        clusters = pd.DataFrame({
+            'cluster_id': cluster_codes[clustered],
+            'variable_name': rows['variable_name'].to_numpy(),
+            'questionnaire_name': rows['questionnaire_name'].astype(object).to_numpy(),
+            'project_source': rows['project_source'].astype(object).to_numpy(),
+            'question_text': rows['question_text'].to_numpy(),
+            'cluster_size': cluster_sizes[cluster_codes[clustered]],
+        })
+        # renumber clusters 0..k-1 in order of their first question
+        clusters['cluster_id'] = pd.factorize(clusters['cluster_id'])[0]
+        clusters = clusters.sort_values('cluster_id', kind='stable').reset_index(drop=True)
+        clusters['representative'] = clusters.groupby('cluster_id')['variable_name'].transform('first')
+        return clusters[self.cluster_columns]
+
+    def find_question_clusters(self, questions_list: QuestionsList) -> pd.DataFrame:
+        return self.find_clusters(questions_list.get_table().df)
+
+    @staticmethod
+    def get_harmonization_map(clusters: pd.DataFrame) -> Dict[str, str]:
+        """{variable_name: cluster representative} for every non-representative clustered question."""
+        others = clusters[clusters['variable_name'] != clusters['representative']]
+        return dict(zip(others['variable_name'], others['representative']))
+
+    @staticmethod
+    def get_parallel_pairs(clusters: pd.DataFrame) -> Dict[str, str]:
+        """
+        {variable_name: parallel_name} seeds for QuestionsList.add_parallel_questions: clusters of
+        exactly two questions from different questionnaires.
+        """
+        pairs_df = clusters[clusters['cluster_size'] == 2]
+        pairs = {}
+        for _, cluster in pairs_df.groupby('cluster_id', sort=False):
+            (first, second), questionnaires = cluster['variable_name'].tolist(), cluster['questionnaire_name']
+            if questionnaires.nunique() == 2:
+                pairs[first] = second
+        return pairs
+
+
+if __name__ == "__main__":
+    import time
+
+    from source.data_etl.questionnaires_metadata.metadata_snapshot import load_snapshot
+
+    questions_list = load_snapshot().questions_list
+    finder = NearDuplicateFinder()
+    start = time.perf_counter()
+    clusters = finder.find_question_clusters(questions_list)
+    elapsed = time.perf_counter() - start
+    print(f"{len(questions_list.questions)} questions -> {clusters['cluster_id'].nunique()} clusters "
+          f"({len(clusters)} questions) in {elapsed:.2f}s, "
+          f"{len(finder.get_parallel_pairs(clusters))} parallel pair seeds")
+    print(clusters.head(30).to_string())
@@ -1,77 +1,122 @@
+import numpy as np
 import pandas as pd
 import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 from source.utils.question_types.multiple_choice_loader import MultipleChoiceLoader, LoadSlider
 from source.consts.data_files_paths import numeric_variables_range_path_df
 
+
+@lru_cache(maxsize=None)
+def load_numeric_value_ranges(path: str = numeric_variables_range_path_df) -> Dict[str, Tuple[Any, Any]]:
+    """
+    column -> (min_limit, max_limit) from the numeric valid-range sheet.
+    Read once per process; the first row of a duplicated column wins.
+    """
+    value_range = pd.read_excel(path)
+    ranges = {}
+    for column, min_limit, max_limit in zip(value_range.column, value_range.min_limit.values,
+                                            value_range.max_limit.values):
+        ranges.setdefault(column, (min_limit, max_limit))
+    return ranges
+
 # validators
 
 class Validator:
+    """
+    Validation spec of one question type.
+
+    Validators keep only the parameters they validate with (no data-dictionary row), use __slots__
+    and are immutable by convention, so ValidatorFactory shares one instance between all questions
+    with the same spec.
+    """
+
+    __slots__ = ()
 
     questionnaire_col = 'Form Name'
     name_col = 'Variable / Field Name'
 
+    @classmethod
+    def get_params(cls, row) -> tuple:
+        """Constructor arguments of the validator of a data-dictionary row."""
+        return ()
 
-    def __init__(self, row):
-        self.row = row
-        self._setup()
+    @classmethod
+    def from_row(cls, row) -> "Validator":
+        return cls(*cls.get_params(row))
 
     def is_valid(self, value):
         NotImplementedError("Each question type must implement its own validation method.")
 
-    def _setup(self):
-        pass
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        """Boolean mask (True = valid) with the same semantics as is_valid, for a whole column."""
+        return series.map(self.is_valid).astype(bool)
 
+    @staticmethod
+    def _in_range(series: pd.Series, min_value, max_value) -> pd.Series:
+        # like the scalar comparison, only numbers count: numeric strings ('1') are not coerced
+        if pd.api.types.is_numeric_dtype(series):
+            values = series
+        else:
+            is_number = np.fromiter((isinstance(v, (int, float, np.number)) for v in series.values),
+                                    dtype=bool, count=len(series))
+            values = pd.to_numeric(series.where(is_number), errors='coerce')
+        return (values >= min_value) & (values <= max_value)
 
-class BinaryValidator(Validator):
+    def __repr__(self):
+        params = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({params})"
 
-    def __init__(self, row):
-        super().__init__(row)
 
+class BinaryValidator(Validator):
 
-    def _setup(self):
-        pass
+    __slots__ = ()
 
     def is_valid(self, value):
         if pd.isna(value): return False
 
         return value in [0, 1]
 
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        return series.isin([0, 1])
+
 
 class CategoricalValidator(Validator):
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.possible_values = None
-        self._setup()
+    __slots__ = ('possible_values',)
+
+    def __init__(self, possible_values: Tuple[Any, ...]):
+        self.possible_values = tuple(possible_values)
 
-    def _setup(self):
-        choices_dict = MultipleChoiceLoader(self.row).choices_dict
-        self.possible_values = list(choices_dict.keys())
+    @classmethod
+    def get_params(cls, row) -> tuple:
+        choices_dict = MultipleChoiceLoader(row).choices_dict
+        return (tuple(choices_dict.keys()),)
 
     def is_valid(self, value):
         if pd.isna(value): return False
         return value in self.possible_values
 
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        return series.isin(self.possible_values)
+
 
 class NumericValidator(Validator):
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.min_value = None
-        self.max_value = None
-        self._setup()
+    __slots__ = ('min_value', 'max_value')
 
-    def _setup(self):
+    default_range = (-1000, 1000)
 
-        value_range = pd.read_excel(numeric_variables_range_path_df)
-        value_range = value_range[value_range.column == self.row[self.name_col]]
-        if value_range.shape[0]:
-            self.min_value = value_range.min_limit.values[0]
-            self.max_value = value_range.max_limit.values[0]
-        else:
+    def __init__(self, min_value, max_value):
+        self.min_value = min_value
+        self.max_value = max_value
 
-            self.min_value = -1000
-            self.max_value = 1000
+    @classmethod
+    def get_params(cls, row, value_ranges: Optional[Dict[str, Tuple[Any, Any]]] = None) -> tuple:
+        # the shared range table is used when no table is given
+        if value_ranges is None:
+            value_ranges = load_numeric_value_ranges()
+        return value_ranges.get(row[cls.name_col], cls.default_range)
 
     def is_valid(self, value):
         if pd.isna(value): return False
@@ -79,17 +124,13 @@ class NumericValidator(Validator):
                    (value <= self.max_value)
         return is_valid
 
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        return self._in_range(series, self.min_value, self.max_value)
 
-class DateValidator(Validator):
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.possible_values = None
-        self._setup()
+class DateValidator(Validator):
 
-    def _setup(self):
-        choices_dict = MultipleChoiceLoader(self.row).choices_dict
-        self.possible_values = list(choices_dict.keys())
+    __slots__ = ()
 
     def is_valid(self, value):
         if pd.isna(value): return True # False
@@ -97,32 +138,75 @@ class DateValidator(Validator):
         return False
         #return parse(value) is not None
 
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return pd.Series(True, index=series.index)
+        is_datetime = np.fromiter((isinstance(v, datetime.datetime) for v in series.values),
+                                  dtype=bool, count=len(series))
+        return series.isna() | is_datetime
+
 
 class SliderValidator(Validator):
 
-    def __init__(self, row):
-        super().__init__(row)
-        self.details = None
-        self._setup()
+    __slots__ = ('min_val', 'max_val')
+
+    def __init__(self, min_val: int, max_val: int):
+        self.min_val = min_val
+        self.max_val = max_val
 
-    def _setup(self):
-        self.details = LoadSlider(self.row).details
+    @classmethod
+    def get_params(cls, row) -> tuple:
+        details = LoadSlider(row).details
+        return details["min_val"], details["max_val"]
+
+    @property
+    def details(self) -> Dict[str, int]:
+        return {"max_val": self.max_val, "min_val": self.min_val}
 
     def is_valid(self, value):
         if pd.isna(value): return False
-        is_valid = (value >= self.details["min_val"]) and \
-                       (value <= self.details["max_val"])
+        is_valid = (value >= self.min_val) and \
+                       (value <= self.max_val)
 
         return is_valid
 
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        return self._in_range(series, self.min_val, self.max_val)
 
-class NullValidator(Validator):
 
-    def __init__(self, row):
-        super().__init__(row)
+class NullValidator(Validator):
 
-    def _setup(self):
-        pass
+    __slots__ = ()
 
     def is_valid(self, value):
         return True
+
+    def validate_series(self, series: pd.Series) -> pd.Series:
+        return pd.Series(True, index=series.index)
+
+
+class ValidatorFactory:
+    """
+    Creates the validator of each question while sharing the lookup tables the validators
+    would otherwise re-read per question (the numeric valid-range sheet).
+    Questions with the same validator class and parameters get the same validator instance.
+    """
+
+    def __init__(self, numeric_ranges_path: str = numeric_variables_range_path_df):
+        self.numeric_ranges = load_numeric_value_ranges(numeric_ranges_path)
+        self.validators: Dict[tuple, Validator] = {}
+
+    def create(self, validator_class, row) -> Validator:
+        if issubclass(validator_class, NumericValidator):
+            params = validator_class.get_params(row, value_ranges=self.numeric_ranges)
+        else:
+            params = validator_class.get_params(row)
+
+        key = (validator_class, params)
+        try:
+            validator = self.validators.get(key)
+        except TypeError:  # unhashable parameters can't be shared
+            return validator_class(*params)
+        if validator is None:
+            validator = self.validators[key] = validator_class(*params)
+        return validator
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from source.consts.data_files_paths import (
     immi_column_names_path,
@@ -22,6 +23,17 @@ class QuestionsMappingCreator:
         questionnaire, standard_question_name, stepped_care_name
 
     """
+    # keys of a mapping row, by how the row was built (SteppedCare keys only when a SteppedCare row matched)
+    MAPPING_KEYS = {
+        'redcap': ['questionnaire', 'standard_question_name', 'imputation_table_name', 'stepped_care_name',
+                   'redcap_name', 'qualtrics_name'],
+        'qualtrics': ['questionnaire', 'standard_question_name', 'imputation_table_name', 'stepped_care_name',
+                      'qualtrics_name', 'redcap_name'],
+        'stepped': ['questionnaire', 'standard_question_name', 'imputation_table_name', 'stepped_care_name',
+                    'stepped_care_match_type', 'orig_step_name', 'redcap_name', 'qualtrics_name'],
+    }
+    STEPPED_KEYS = ['stepped_care_match_type', 'orig_step_name']
+
     def __init__(self):
 
         self.redcap_df = pd.read_excel(immi_column_names_path).copy()
@@ -29,7 +41,7 @@ class QuestionsMappingCreator:
 
         self.imputation_map = pd.read_csv(imputation_map_path).copy()
         self.stepped_care_map = pd.read_csv(stepped_care_map_path).copy()
-        self.invalid_columns = pd.read_excel(invalid_columns_path_df).column_name.to_list()
+        self.invalid_columns = set(pd.read_excel(invalid_columns_path_df).column_name.to_list())
 
         self.redcap_df.drop_duplicates(inplace=True)
         self.qualtrics_df.drop_duplicates(inplace=True)
@@ -39,37 +51,49 @@ class QuestionsMappingCreator:
         self.qualtrics_questionnaires = {}
 
         self._prepare_questionnaire_columns()
+        self._prepare_lookup_tables()
         self.ALL_RULES = {**TRANSFORMATION_RULES, **Stepped_Care_Extras}
 
         renames = pd.read_excel(questionnaires_database_names_map_path)
         self.renames = {row['questionnaire']: row['database-name'] for _, row in renames.iterrows()}
 
-        self.HANDLERS = {
-            'DEFAULT': self._handle_default,
-            'EXTRA QUESTIONS IN REDCAP':  self._handle_default,
-            'EXTRA QUESTIONS IN QUALTRICS': self._handle_extra_in_qualtrics,
-            'REDCAP_ONLY':  self._handle_default,
+        # rule -> which export drives the questionnaire's rows (None = SteppedCare map only)
+        self.RULE_DRIVERS = {
+            'DEFAULT': 'redcap',
+            'EXTRA QUESTIONS IN REDCAP': 'redcap',
+            'EXTRA QUESTIONS IN QUALTRICS': 'qualtrics',
+            'REDCAP_ONLY': 'redcap',
             # 'EXTRA QUESTIONS IN STEPPEDCARE': _handle_extra_in_stepped,
-            'STEPPED_ONLY': self._handle_stepped_only,
+            'STEPPED_ONLY': None,
         }
+        # rules that also get the SteppedCare-only rows of the questionnaire
+        self.STEPPED_ROWS_RULES = ['DEFAULT', 'EXTRA QUESTIONS IN REDCAP', 'REDCAP_ONLY', 'STEPPED_ONLY']
 
 
     def run(self, save_map=False):
-
-        column_names_mapping = []
-        for questionnaire, rule in self.ALL_RULES.items():
-            handler = self.HANDLERS.get(rule)
-            if handler is None:
-                #print(questionnaire)
-                raise ValueError(f"Unknown rule: {rule} for questionnaire {questionnaire}")
-
-            rows = handler(questionnaire, rule)
-            column_names_mapping.extend(rows)
-
-
-        column_names_df = pd.DataFrame(column_names_mapping)
-        column_names_df['project_source'] = column_names_df.apply(self.project_source, axis=1)
-        column_names_df['database_questionnaire'] = column_names_df.questionnaire.apply(lambda x: self.renames.get(x, x))
+        """
+        Build the column names mapping with frame joins:
+        - REDCap / Qualtrics driven rules: the exploded column list of the driving export, joined with
+          the other export, the imputation map and the SteppedCare map.
+        - SteppedCare-only rows: the SteppedCare map joined with the rules.
+        Rows keep the order of ALL_RULES (driver rows, then SteppedCare-only rows, per questionnaire).
+        """
+        rules = self._get_rules_frame()
+        parts = [
+            self._driven_rows(rules, 'redcap'),
+            self._driven_rows(rules, 'qualtrics'),
+            self._stepped_only_rows(rules),
+        ]
+        column_names_df = pd.concat(parts, ignore_index=True)
+        column_names_df = column_names_df.sort_values(['rule_order', 'part', 'position'], kind='stable',
+                                                      ignore_index=True)
+
+        columns = self._get_mapping_columns(column_names_df)
+        column_names_df = column_names_df[columns].infer_objects()
+        column_names_df['project_source'] = self.project_source(column_names_df)
+        questionnaires = column_names_df.questionnaire
+        column_names_df['database_questionnaire'] = questionnaires.map(self.renames).where(
+            questionnaires.isin(self.renames.keys()), questionnaires)
 
         if save_map:
             column_names_df.to_csv("column_names_mapping.csv", index=False)
@@ -79,82 +103,151 @@ class QuestionsMappingCreator:
 
 
     @staticmethod
-    def project_source(row):
-        if pd.isna(row['stepped_care_name']):
-            return 'immi'
-        else:
-            if pd.isna(row['redcap_name']):
-                return 'step'
-            else:
-                return 'both'
-        raise ValueError
-
-    def _sc_rows(self, questionnaire: str) -> pd.DataFrame:
-        return self.stepped_care_map[self.stepped_care_map['questionnaire'] == questionnaire].copy()
-
+    def project_source(df: pd.DataFrame) -> np.ndarray:
+        return np.select(
+            [df['stepped_care_name'].isna().to_numpy(), df['redcap_name'].isna().to_numpy()],
+            ['immi', 'step'],
+            default='both',
+        ).astype(object)
+
+    def _get_mapping_columns(self, df: pd.DataFrame):
+        """Columns in order of first appearance, as if the rows were built one dict at a time."""
+        columns = {}
+        for kind, matched in df[['kind', 'stepped_matched']].drop_duplicates().itertuples(index=False):
+            columns.update(dict.fromkeys(self.MAPPING_KEYS[kind]))
+            if matched:
+                columns.update(dict.fromkeys(self.STEPPED_KEYS))
+        return list(columns)
+
+    def _get_rules_frame(self) -> pd.DataFrame:
+        for questionnaire, rule in self.ALL_RULES.items():
+            if rule not in self.RULE_DRIVERS:
+                raise ValueError(f"Unknown rule: {rule} for questionnaire {questionnaire}")
+        return pd.DataFrame({
+            'questionnaire': list(self.ALL_RULES.keys()),
+            'rule': list(self.ALL_RULES.values()),
+            'rule_order': range(len(self.ALL_RULES)),
+        })
 
-    def _handle_default(self, questionnaire, rule):
+    @staticmethod
+    def _explode_columns(questionnaires_columns: dict) -> pd.DataFrame:
+        """questionnaire -> [columns] as a long frame (questionnaire, question, position)."""
+        columns = pd.Series(list(questionnaires_columns.values()), index=list(questionnaires_columns.keys()),
+                            dtype=object)
+        long_df = columns.explode().dropna().rename_axis('questionnaire').reset_index(name='question')
+        long_df['position'] = long_df.groupby('questionnaire', sort=False).cumcount()
+        return long_df
+
+    def _driven_rows(self, rules: pd.DataFrame, driver: str) -> pd.DataFrame:
+        """
+        Rows of the questionnaires driven by `driver` ('redcap' / 'qualtrics'): every valid column of
+        the driving export, with the other export's name when it has the same column.
         """
-        Iterate REDCap columns as the canonical driver, attach Qualtrics if present,
-        and add SteppedCare from the external CSV if mapped.
-        Also used for 'EXTRA QUESTIONS IN REDCAP' and 'REDCAP_ONLY'.
+        other = 'qualtrics' if driver == 'redcap' else 'redcap'
+        driver_long = self.redcap_long if driver == 'redcap' else self.qualtrics_long
+        other_columns = self.qualtrics_questionnaires if driver == 'redcap' else self.redcap_questionnaires
+        other_long = self.qualtrics_long if driver == 'redcap' else self.redcap_long
+
+        drivers = rules[rules.rule.map(self.RULE_DRIVERS) == driver]
+        df = drivers.merge(driver_long, on='questionnaire')
+        df = df[~df.question.isin(self.invalid_columns)]
+
+        compare_other = (df.rule != 'REDCAP_ONLY').to_numpy()
+        missing_other = ~df.questionnaire.isin(other_columns.keys()).to_numpy() & compare_other
+        if missing_other.any():
+            raise KeyError(df.questionnaire.to_numpy()[missing_other][0])
+
+        in_other = pd.MultiIndex.from_frame(df[['questionnaire', 'question']]).isin(
+            pd.MultiIndex.from_frame(other_long[['questionnaire', 'question']]))
+        question = df.question.to_numpy(dtype=object)
+
+        rows = self._mapping_rows(df.questionnaire, df.question)
+        rows[f'{driver}_name'] = question
+        rows[f'{other}_name'] = np.where(compare_other & in_other, question, None)
+        rows = self._add_stepped_care_columns(rows, df.questionnaire, df.question)
+        return self._with_order(rows, df, part=0, kind=driver)
+
+    def _stepped_only_rows(self, rules: pd.DataFrame) -> pd.DataFrame:
         """
-        rows = []
-        for question in self.redcap_questionnaires.get(questionnaire, []):
-            if question in self.invalid_columns:
-                continue
-            new_map = self._setup_for_mapping_question(questionnaire, question)
-            new_map = self._add_redcap_question(question, questionnaire, rule, new_map)
-            new_map = self._add_stepped_care_column(questionnaire, question, new_map)
-            rows.append(new_map)
-        stepped_rows = self._handle_stepped_only(questionnaire, rule)
-        return rows + stepped_rows
-
-
-    def _handle_extra_in_qualtrics(self, questionnaire, rule):
+        SteppedCare map rows without a standard name (or matched manually) of every questionnaire
+        whose rule includes SteppedCare-only questions.
         """
-        Iterate Qualtrics columns as the driver when it is the superset for this questionnaire.
-        Attach REDCap if present, plus SteppedCare from CSV if mapped.
+        drivers = rules[rules.rule.isin(self.STEPPED_ROWS_RULES)].copy()
+        drivers['questionnaire'] = drivers.questionnaire.map(lambda q: self.renames.get(q, q))
+
+        sc_map = self.stepped_care_map.assign(position=range(len(self.stepped_care_map)))
+        sc_map = sc_map[(sc_map.standard_question_name.isna()) | (sc_map.match_type == 'Manually')]
+        sc_map = sc_map[~sc_map.stepped_care_name.isin(self.invalid_columns)]
+        df = drivers.merge(sc_map, on='questionnaire')
+
+        is_manual = (df.match_type == 'Manually').to_numpy()
+        col_name = pd.Series(np.where(is_manual, df.standard_question_name, df.stepped_care_name),
+                             index=df.index, dtype=object)
+
+        rows = self._mapping_rows(df.questionnaire, col_name)
+        rows['stepped_care_name'] = df.stepped_care_name.to_numpy(dtype=object)
+        rows['stepped_care_match_type'] = df.match_type.to_numpy(dtype=object)
+        rows['orig_step_name'] = df.orig_step_name.to_numpy(dtype=object)
+        rows['redcap_name'] = df.standard_question_name.to_numpy(dtype=object)
+        rows['qualtrics_name'] = np.full(len(df), None, dtype=object)
+        rows['stepped_matched'] = True
+        return self._with_order(rows, df, part=1, kind='stepped')
+
+    def _mapping_rows(self, questionnaire: pd.Series, question: pd.Series) -> pd.DataFrame:
+        imputation_names = question.map(self.imputation_lookup)
+        return pd.DataFrame({
+            'questionnaire': questionnaire.to_numpy(dtype=object),
+            'standard_question_name': question.str.strip().to_numpy(dtype=object),
+            'imputation_table_name': np.where(question.isin(self.imputation_lookup.keys()),
+                                              imputation_names, None),
+            'stepped_care_name': np.full(len(question), None, dtype=object),
+        })
+
+    def _add_stepped_care_columns(self, rows: pd.DataFrame, questionnaire: pd.Series, question: pd.Series):
         """
-        rows = []
-        for question in self.qualtrics_questionnaires.get(questionnaire, []):
-            if question in self.invalid_columns:
-                continue
-            new_map = self._setup_for_mapping_question(questionnaire, question)
-            new_map = self._add_qualtrics_question(question, questionnaire, new_map)
-            new_map = self._add_stepped_care_column(questionnaire, question, new_map)
-            rows.append(new_map)
+        A.1: fills stepped_care_name by looking up (questionnaire, standard_question_name)
+        in the external CSV map (first matching row).
+        """
+        renamed = questionnaire.map(lambda q: self.renames.get(q, q))
+        positions = self.stepped_care_index.get_indexer(pd.MultiIndex.from_arrays([renamed, question]))
+        matched = positions >= 0
+        positions = self.stepped_care_first_positions[positions[matched]]
+        first_rows = self.stepped_care_map.iloc[positions]
+
+        for column, map_column, default in [('stepped_care_name', 'stepped_care_name', None),
+                                            ('stepped_care_match_type', 'match_type', np.nan),
+                                            ('orig_step_name', 'orig_step_name', np.nan)]:
+            values = np.full(len(rows), default, dtype=object)
+            values[matched] = first_rows[map_column].to_numpy(dtype=object)
+            rows[column] = values
+        rows['stepped_matched'] = matched
         return rows
 
+    @staticmethod
+    def _with_order(rows: pd.DataFrame, df: pd.DataFrame, part: int, kind: str) -> pd.DataFrame:
+        rows['rule_order'] = df.rule_order.to_numpy()
+        rows['part'] = part
+        rows['position'] = df.position.to_numpy()
+        rows['kind'] = kind
+        return rows
 
-    def _handle_stepped_only(self, questionnaire: str, rule: str):
+    def _prepare_lookup_tables(self):
         """
-        Questionnaire exists only in SteppedCare.
-        We walk the CSV map rows for this questionnaire and produce mappings
-        where REDCap/Qualtrics are None.
+        Index the external maps once: the REDCap / Qualtrics column lists as long frames,
+        (questionnaire, standard name) -> first stepped care row, new_name -> original imputation name
+        (first occurrence).
         """
-        rows = []
-        questionnaire = self.renames.get(questionnaire, questionnaire)
-        q_df = self._sc_rows(questionnaire)
-        q_df = q_df[(q_df.standard_question_name.isna()) | (q_df.match_type == 'Manually')]
-        for _, r in q_df.iterrows():
-            if r['stepped_care_name'] in self.invalid_columns:
-                continue
-            if r['match_type'] == 'Manually':
-                col_name = r['standard_question_name']
-            else:
-                col_name = r['stepped_care_name']
-            new_map = self._setup_for_mapping_question(questionnaire, col_name)
-            # SteppedCare name from map
-            new_map['stepped_care_name'] = r.get('stepped_care_name')
+        self.redcap_long = self._explode_columns(self.redcap_questionnaires)
+        self.qualtrics_long = self._explode_columns(self.qualtrics_questionnaires)
 
-            new_map['stepped_care_match_type'] = r.get('match_type')
-            new_map['orig_step_name'] = r.get('orig_step_name')
+        self.stepped_care_index = pd.MultiIndex.from_frame(
+            self.stepped_care_map[['questionnaire', 'standard_question_name']].drop_duplicates(keep='first'))
+        first_positions = ~self.stepped_care_map.duplicated(['questionnaire', 'standard_question_name'])
+        self.stepped_care_first_positions = np.flatnonzero(first_positions.to_numpy())
 
-            new_map['redcap_name'] = r.get('standard_question_name')
-            new_map['qualtrics_name'] = None
-            rows.append(new_map)
-        return rows
+        self.imputation_lookup = {}
+        for new_name, original in zip(self.imputation_map["new_name"], self.imputation_map["original"]):
+            self.imputation_lookup.setdefault(new_name, original)
 
     def _prepare_questionnaire_columns(self):
         for idx, row in self.redcap_df.iterrows():
@@ -170,67 +263,6 @@ class QuestionsMappingCreator:
                 self.qualtrics_questionnaires[row['questionnaire_name']] = row['column_names'].split(',')
 
 
-    def _setup_for_mapping_question(self, questionnaire, question):
-        new_map = {
-            'questionnaire': questionnaire,
-            'standard_question_name': question.strip()
-        }
-        new_map = self._add_imputation_column(question, new_map)
-        new_map['stepped_care_name'] = None
-        return new_map
-
-
-    def _add_redcap_question(self, question, questionnaire, transformation_rule, new_map):
-        new_map['redcap_name'] = question
-        if transformation_rule == 'REDCAP_ONLY':
-            new_map['qualtrics_name'] = None
-        elif question in self.qualtrics_questionnaires[questionnaire]:
-            new_map['qualtrics_name'] = question
-        else:
-            new_map['qualtrics_name'] = None
-        return new_map
-
-
-    def _add_qualtrics_question(self, question, questionnaire, new_map):
-        new_map['qualtrics_name'] = question
-
-        if question in self.redcap_questionnaires[questionnaire]:
-            new_map['redcap_name'] = question
-        else:
-            new_map['redcap_name'] = None
-        return new_map
-
-
-    def _add_imputation_column(self, standard_name, new_map):
-        if standard_name in list(self.imputation_map["new_name"]):
-            origin = self.imputation_map[self.imputation_map["new_name"] == standard_name]["original"]
-            new_map['imputation_table_name'] = origin.values[0] if len(origin) else None
-        else:
-            new_map['imputation_table_name'] = None
-
-        return new_map
-
-
-
-    def _add_stepped_care_column(self, questionnaire: str, standard_name: str, new_map: dict):
-        """
-        A.1: fills stepped_care_name by looking up (questionnaire, standard_question_name)
-        in the external CSV map.
-        """
-        questionnaire = self.renames.get(questionnaire, questionnaire)
-        q_df = self._sc_rows(questionnaire)
-        if q_df.empty:
-            return new_map
-        # exact match on standard name
-        match = q_df[q_df['standard_question_name'] == standard_name]
-        if not match.empty:
-            new_map['stepped_care_name'] = match.iloc[0].get('stepped_care_name')
-            new_map['stepped_care_match_type'] = match.iloc[0].get('match_type')
-            new_map['orig_step_name'] = match.iloc[0].get('orig_step_name')
-
-        return new_map
-
-
 
 if __name__ == "__main__":
     a = QuestionsMappingCreator().run()
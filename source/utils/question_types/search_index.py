@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from source.utils.question_types.textual_question_type import normalize_for_match, normalize_series
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram -> positions over a list of texts, for substring and fuzzy lookups.
+
+    Texts are indexed as given, so callers normalize them (and their queries) the same way.
+    """
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        postings = defaultdict(list)
+        for position, text in enumerate(texts):
+            for gram in self.get_trigrams(text):
+                postings[gram].append(position)
+        self.postings: Dict[str, np.ndarray] = {gram: np.array(positions, dtype=np.int64)
+                                                for gram, positions in postings.items()}
+
+    @staticmethod
+    def get_trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def substring_positions(self, query: str) -> np.ndarray:
+        """Sorted positions of the texts containing `query`."""
+        grams = self.get_trigrams(query)
+        if not grams:
+            # shorter than a trigram - nothing to narrow down with
+            return np.array([i for i, text in enumerate(self.texts) if query in text], dtype=np.int64)
+
+        postings = []
+        for gram in grams:
+            if gram not in self.postings:
+                return np.empty(0, dtype=np.int64)
+            postings.append(self.postings[gram])
+        postings.sort(key=len)
+        candidates = postings[0]
+        for positions in postings[1:]:
+            candidates = np.intersect1d(candidates, positions, assume_unique=True)
+            if not len(candidates):
+                break
+        return np.array([i for i in candidates if query in self.texts[i]], dtype=np.int64)
+
+    def similarity(self, query: str) -> np.ndarray:
+        """Share of the query trigrams found in each text (0 for texts sharing none)."""
+        grams = self.get_trigrams(query)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.zeros(len(self.texts))
+        return np.bincount(np.concatenate(hits), minlength=len(self.texts)) / len(grams)
+
+
+class QuestionSearchIndex:
+    """
+    Ranked search over the questions of a QuestionsTable (rows = positions in the QuestionsList).
+
+    Behaviour:
+    - Variable name, question text and questionnaire name are normalized with normalize_for_match
+      (HTML, Hebrew diacritics and gender variants like פעיל/ה, case, '_' and '-' as spaces) and
+      held in one TrigramIndex each; queries get the same normalization.
+    - A question scores the best of its fields: the field weight times 1.0 for an exact field,
+      0.9 for a prefix and 0.8 for a substring match, or (fuzzy) 0.7 times the share of the query
+      trigrams found in the field, when that share reaches `min_similarity`.
+    - A separate index over the lower-cased raw labels serves the exact (non-normalized) substring
+      semantics of QuestionsList.search_by_label.
+    """
+
+    field_weights = {'variable_name': 1.0, 'question_text': 0.9, 'questionnaire_name': 0.6}
+    match_quality = {'exact': 1.0, 'prefix': 0.9, 'substring': 0.8, 'fuzzy': 0.7}
+
+    def __init__(self, table: pd.DataFrame):
+        self.indexes: Dict[str, TrigramIndex] = {
+            field: TrigramIndex(normalize_series(table[field].astype(object).fillna('')).tolist())
+            for field in self.field_weights
+        }
+        self.label_index = TrigramIndex([text.lower() if isinstance(text, str) else ""
+                                         for text in table['question_text']])
+        self.n_questions = len(table)
+
+    def find_label_positions(self, word: str) -> np.ndarray:
+        """Positions of the questions whose lower-cased text contains `word` (lower-cased)."""
+        return self.label_index.substring_positions(word.lower())
+
+    def search(self, query: str, fuzzy: bool = True, min_similarity: float = 0.6,
+               limit: int | None = None) -> pd.Series:
+        """
+        Scores of the matching questions, indexed by position and sorted best first
+        (ties keep the list order).
+        """
+        query = normalize_for_match(query).strip()
+        scores = np.zeros(self.n_questions)
+        if query:
+            for field, weight in self.field_weights.items():
+                self._score_field(self.indexes[field], query, weight, fuzzy, min_similarity, scores)
+
+        positions = np.flatnonzero(scores)
+        order = np.lexsort((positions, -scores[positions]))[:limit]
+        return pd.Series(scores[positions[order]], index=positions[order], name='score')
+
+    def _score_field(self, index: TrigramIndex, query: str, weight: float, fuzzy: bool, min_similarity: float,
+                     scores: np.ndarray):
+        if fuzzy and len(query) >= 3:
+            similarity = index.similarity(query)
+            similar = similarity >= min_similarity
+            np.maximum.at(scores, np.flatnonzero(similar),
+                          weight * self.match_quality['fuzzy'] * similarity[similar])
+
+        for position in index.substring_positions(query):
+            text = index.texts[position]
+            kind = 'exact' if text == query else 'prefix' if text.startswith(query) else 'substring'
+            scores[position] = max(scores[position], weight * self.match_quality[kind])
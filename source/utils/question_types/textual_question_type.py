@@ -1,9 +1,15 @@
+import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
+from functools import lru_cache
 import re, unicodedata
 
 HEBREW_RANGE = r"\u0590-\u05FF"
 
+# labels without tags or entities are returned by BeautifulSoup unchanged (up to surrounding whitespace)
+MARKUP_PATTERN = re.compile(r"[<&]")
+NORMALIZE_CACHE_SIZE = 1 << 16
+
 
 
 
@@ -53,7 +59,19 @@ def normalize_for_match(s: str) -> str:
     Full pass used before similarity:
     HTML -> Hebrew diacritics -> gender collapse -> generic normalize
     (Safe for non-Hebrew too; Hebrew steps no-op if none present.)
+    Strings are memoized (bounded LRU); other values (None / NaN / numbers) go through the pipeline.
     """
+    if isinstance(s, str):
+        return _normalize_text(s)
+    return _normalize_pipeline(s)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_text(s: str) -> str:
+    return _normalize_pipeline(s)
+
+
+def _normalize_pipeline(s):
     s = clean_html_and_fix_qmark(s)
     s = strip_hebrew_diacritics(s)
     s = collapse_hebrew_gender_variants(s)
@@ -61,6 +79,21 @@ def normalize_for_match(s: str) -> str:
     return s
 
 
+def normalize_series(series: pd.Series) -> pd.Series:
+    """
+    normalize_for_match over a whole column: every distinct label is normalized once
+    (through the memoized fast path) and broadcast back to the rows.
+    """
+    codes, uniques = pd.factorize(series)
+    normalized = np.array([normalize_for_match(value) for value in uniques] + [None], dtype=object)
+    result = pd.Series(normalized[codes], index=series.index, name=series.name, dtype=object)
+
+    missing = codes == -1
+    if missing.any():
+        # missing labels keep their own normalization (None -> "", NaN -> "nan")
+        result[missing] = series[missing].map(normalize_for_match)
+    return result
+
 
 # ---------- 1) Source cleanup (Hebrew-aware) ----------
 
@@ -68,7 +101,11 @@ def clean_html_and_fix_qmark(s: str) -> str:
     """Remove HTML; if string starts with '?' move it to the end."""
     if pd.isna(s):
         return s
-    text = BeautifulSoup(str(s), "html.parser").get_text().strip()
+    s = str(s)
+    if MARKUP_PATTERN.search(s) is None:
+        text = s.strip()
+    else:
+        text = BeautifulSoup(s, "html.parser").get_text().strip()
     if text.startswith("?") and len(text) > 1:
         text = text[1:].strip() + "?"
     return text
@@ -156,18 +193,41 @@ def levenshtein_cheap(a: str, b: str) -> int:
     a, b = normalize_for_match(a), normalize_for_match(b)
     if a == b:
         return 0
-    # small optimization: difference lower bound
-    if abs(len(a) - len(b)) > 3 and max(len(a), len(b)) > 6:
-        pass  # keep it simple; skip early exits for clarity
-    dp = range(len(b) + 1)
-    for i, ca in enumerate(a, 1):
-        ndp = [i]
-        for j, cb in enumerate(b, 1):
-            ndp.append(min(
-                dp[j] + 1,  # deletion
-                ndp[-1] + 1,  # insertion
-                dp[j - 1] + (ca != cb)  # substitution
-            ))
-        dp = ndp
-    return dp[-1]
+    return levenshtein_distance(a, b)
+
+
+def levenshtein_distance(a: str, b: str) -> int:
+    """
+    Edit distance (insert / delete / substitute, cost 1) with the bit-parallel algorithm of
+    Myers / Hyyro: one column of the DP matrix is a pair of bit vectors over `a`, so each
+    character of `b` costs a few integer operations instead of len(a) Python steps.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    # pattern = the shorter string, so the bit vectors stay small
+    peq = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+
+    pv, mv, score = mask, 0, len(b)
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
 
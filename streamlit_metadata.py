@@ -8,10 +8,8 @@ from dataclasses import asdict, is_dataclass
 
 from source.consts.enums import ScoringMethod
 from source.data_etl.questionnaires_metadata.info_objects import QuestionInfo, QuestionnaireInfo, ScoringInfo
-from source.data_etl.questionnaires_metadata.stepped_care.questionnaire.questionnaire_loader import QuestionnaireLoader
-from source.data_etl.questionnaires_metadata.stepped_care.single_question.questions_loader import QuestionLoader
+from source.data_etl.questionnaires_metadata.metadata_snapshot import load_snapshot
 import inspect
-import textwrap
 
 sys.path.insert(0, os.getcwd())
 
@@ -293,23 +291,9 @@ def display_questions_info(displayed_question_list: List["QuestionInfo"], *,
         st.info("No questions found for this questionnaire.")
         return
 
-    # Build a compact DataFrame for fast rendering
-    recs = []
-    for q in displayed_question_list:
-        q_type = _enum_to_str(q.question_type)
-        source = q.project_source or ""
-        text_short = textwrap.shorten(str(q.question_text or ""), width=120, placeholder="…")
-        recs.append({
-            "Var": q.variable_name,
-            "Text": text_short,
-            "Type": q_type,
-            "Source": source,
-            "Options": _format_question_options(q),
-            "_timestamp": bool(q.is_timestamp),
-            "_exceptional": bool(q.is_exceptional_item),
-        })
-
-    df = pd.DataFrame.from_records(recs)
+    # Slice the cached display table of all questions (built once per process)
+    positions = get_questions().get_table().get_positions([q.variable_name for q in displayed_question_list])
+    df = get_questions_view().reindex(positions).reset_index(drop=True)
     display_cols = ["Var", "Text", "Type", "Source", "Options"]
 
     # Palettes (colorblind-friendly leaning)
@@ -342,9 +326,11 @@ def display_questions_info(displayed_question_list: List["QuestionInfo"], *,
 
     # Apply filters
     mask = pd.Series(True, index=df.index)
+    scores = None
     if _nonempty(search):
-        s = search.lower()
-        mask &= df["Var"].str.lower().str.contains(s) | df["Text"].str.lower().str.contains(s)
+        # ranked trigram search over all questions, restricted to the displayed ones
+        scores = pd.Series(positions).map(get_questions().get_search_index().search(search))
+        mask &= scores.notna()
     if _nonempty(types_sel):
         mask &= df["Type"].isin(types_sel)
     if _nonempty(sources_sel):
@@ -355,6 +341,8 @@ def display_questions_info(displayed_question_list: List["QuestionInfo"], *,
         mask &= df["_exceptional"]
 
     dff = df.loc[mask].copy()
+    if scores is not None:
+        dff = dff.loc[scores[mask].sort_values(ascending=False, kind="stable").index]
     dff_view = dff[display_cols]
 
     # --- Legends (badges) ---
@@ -686,13 +674,31 @@ def render_scoring_info(info: Optional[ScoringInfo]) -> None:
 
 # --- Cache the heavy stuff ---
 @st.cache_resource(show_spinner=False)
+def get_snapshot():
+    # persists across reruns in this session; compiled once, rebuilt only when an input file changes.
+    # Both lists come from this one load, so inputs are hashed and the graph unpickled once per worker.
+    return load_snapshot()
+
 def get_questionnaires():
-    # persists across reruns in this session
-    return QuestionnaireLoader().load_questionnaires()
+    return get_snapshot().questionnaires_list
 
-@st.cache_resource(show_spinner=False)
 def get_questions():
-    return QuestionLoader().load_questions()
+    return get_snapshot().questions_list
+
+@st.cache_resource(show_spinner=False)
+def get_questions_view() -> pd.DataFrame:
+    # display columns of every question, aligned with the rows of questions.get_table()
+    questions = get_questions()
+    table = questions.get_table().df
+    return pd.DataFrame({
+        "Var": table["variable_name"],
+        "Text": table["short_text"],
+        "Type": table["question_type"],
+        "Source": table["project_source"],
+        "Options": [_format_question_options(q) for q in questions.questions],
+        "_timestamp": table["is_timestamp"],
+        "_exceptional": table["is_exceptional_item"],
+    })
 
 
 st.set_page_config(page_title="Questionnaire Metadata Explorer", layout="wide")
@@ -6,10 +6,9 @@ import pandas as pd
 import hashlib
 from dataclasses import asdict, is_dataclass
 import inspect
-import textwrap
 
 from source.data_etl.questionnaires_metadata.info_objects import QuestionInfo
-from source.data_etl.questionnaires_metadata.stepped_care.single_question.questions_loader import QuestionLoader
+from source.data_etl.questionnaires_metadata.metadata_snapshot import load_snapshot
 from source.data_preprocessing.pathology_variables.pathologies_map import PathologiesNames
 from source.data_preprocessing.pathology_variables.pathology_variable import PathologyVariable
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -26,11 +25,6 @@ def _enum_name(e: Any) -> str:
         return str(e)
 
 
-def _enum_to_str(e) -> str:
-    # Handles Enum or plain strings
-    return getattr(e, "name", str(e))
-
-
 def _badge(label: str, color: str) -> str:
     # Small rounded badge (render in st.markdown(..., unsafe_allow_html=True))
     return f"""
@@ -201,34 +195,17 @@ def display_pathology_items(items: List[str], questions_index: Any):
 
     questions_by_var: Dict[str, Optional[QuestionInfo]] = {v: questions_index.get_by_variable_name(v) for v in items}
 
-    recs = []
-    for var in items:
-        q = questions_by_var.get(var)
-        if q is None:
-            recs.append({
-                "Var": var,
-                "Text": "",
-                "Type": "",
-                "Source": "",
-                "Questionnaire": "",
-                "Choices": 0,
-            })
-            continue
-
-        q_type = _enum_to_str(q.question_type)
-        source = q.project_source or ""
-        qname = str(q.questionnaire_name or "")
-        text_short = textwrap.shorten(str(q.question_text or ""), width=120, placeholder="…")
-        recs.append({
-            "Var": q.variable_name,
-            "Text": text_short,
-            "Type": q_type,
-            "Source": source,
-            "Questionnaire": qname,
-            "Choices": len(q.choices) if isinstance(q.choices, dict) else 0,
-        })
-
-    df = pd.DataFrame.from_records(recs)
+    table = questions_index.get_table()
+    positions = table.get_positions(items)
+    view = table.select(items)
+    df = pd.DataFrame({
+        "Var": view["variable_name"].fillna(pd.Series(items)),
+        "Text": view["short_text"].fillna(""),
+        "Type": view["question_type"].astype(object).fillna(""),
+        "Source": view["project_source"].astype(object).fillna(""),
+        "Questionnaire": view["questionnaire_name"].astype(object).fillna(""),
+        "Choices": view["n_choices"].fillna(0).astype(int),
+    })
 
     palette = [
         "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
@@ -237,7 +214,7 @@ def display_pathology_items(items: List[str], questions_index: Any):
     ]
 
     type_values = sorted([t for t in df["Type"].unique() if _nonempty(t)])
-    source_values = df["Source"].dropna().unique().tolist()
+    source_values = [s for s in df["Source"].unique() if _nonempty(s)]
 
     type_colors = {t: _hash_color(t, palette) for t in type_values}
     source_colors = {s: _hash_color(s, palette[::-1]) for s in source_values}
@@ -254,21 +231,24 @@ def display_pathology_items(items: List[str], questions_index: Any):
             missing_only = st.toggle("Missing metadata only", value=False)
 
     mask = pd.Series(True, index=df.index)
+    scores = None
     if _nonempty(search):
-        s = search.lower()
-        mask &= (
-            df["Var"].str.lower().str.contains(s)
-            | df["Text"].str.lower().str.contains(s)
-            | df["Questionnaire"].fillna("").astype(str).str.lower().str.contains(s)
-        )
+        # ranked trigram search over all questions; items without metadata match on their name only
+        scores = pd.Series(positions).map(questions_index.get_search_index().search(search))
+        unknown = pd.Series(positions) == -1
+        scores[unknown & df["Var"].str.lower().str.contains(search.lower(), regex=False)] = 0
+        mask &= scores.notna()
     if _nonempty(types_sel):
         mask &= df["Type"].isin(types_sel)
     if _nonempty(sources_sel):
-        mask &= df["Source"].isin(sources_sel)
+        # items without a source (or without metadata) have nothing to filter on and stay listed
+        mask &= df["Source"].isin(sources_sel) | (df["Source"] == "")
     if missing_only:
         mask &= (df["Questionnaire"].fillna("").astype(str).str.strip() == "")
 
     dff = df.loc[mask].copy()
+    if scores is not None:
+        dff = dff.loc[scores[mask].sort_values(ascending=False, kind="stable").index]
 
     with st.expander("Legend / color keys", expanded=False):
         if type_values:
@@ -289,8 +269,12 @@ def display_pathology_items(items: List[str], questions_index: Any):
 
 
 @st.cache_resource(show_spinner=False)
+def get_snapshot():
+    return load_snapshot()
+
+
 def get_questions():
-    return QuestionLoader().load_questions()
+    return get_snapshot().questions_list
 
 
 st.set_page_config(page_title="Pathology Metadata Explorer", layout="wide")
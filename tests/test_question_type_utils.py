@@ -0,0 +1,34 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from source.utils.question_types.question_type_utils import NumericValidator, SliderValidator
+
+
+def _scalar_mask(validator, series: pd.Series) -> list:
+    """is_valid per value; values it cannot compare (TypeError) are invalid."""
+    mask = []
+    for value in series:
+        try:
+            mask.append(bool(validator.is_valid(value)))
+        except TypeError:
+            mask.append(False)
+    return mask
+
+
+@pytest.mark.parametrize("validator", [NumericValidator(0, 10), SliderValidator(0, 10)])
+@pytest.mark.parametrize("values", [
+    [1, 5.5, 11, -1, np.nan, None],
+    [1, "1", "5", 2.0, np.nan, "abc", None, True, datetime.datetime(2024, 1, 1)],
+    ["1", "2", "3"],
+])
+def test_validate_series_matches_is_valid(validator, values):
+    series = pd.Series(values)
+
+    assert validator.validate_series(series).tolist() == _scalar_mask(validator, series)
+
+
+def test_numeric_strings_are_invalid():
+    assert not NumericValidator(0, 10).validate_series(pd.Series(["1", 1], dtype=object))[0]
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from source.consts.enums import ScoringMethod
+from source.data_etl.questionnaires_metadata.info_objects import ScoresList, ScoringInfo
+from source.data_preprocessing.questionnaire_scores.scoring_cache import ScoringCache
+from source.data_preprocessing.questionnaire_scores.scoring_engine import ScoringEngine
+
+
+def _engine() -> ScoringEngine:
+    scoring_info = ScoringInfo(questionnaire_name="q", aggregation_function=ScoringMethod.SUM,
+                               columns=["q_1", "q_2"], reversed_columns=None, clusters=None)
+    return ScoringEngine(ScoresList([scoring_info]))
+
+
+def _items() -> pd.DataFrame:
+    return pd.DataFrame({"q_1": [1, 2, 3], "q_2": [4, 5, np.nan]})
+
+
+def test_lookup_in_empty_entry_reuses_nothing():
+    cache = ScoringCache()
+    cache.store("fp", pd.Index([]), np.array([], dtype=np.uint64), {"q_score": np.array([])})
+
+    reusable, scores = cache.lookup("fp", pd.Index([0, 1]), np.array([1, 2], dtype=np.uint64))
+
+    assert not reusable.any()
+    assert np.isnan(scores["q_score"]).all()
+
+
+def test_empty_export_scored_first_then_full_export():
+    engine, df, cache = _engine(), _items(), ScoringCache()
+    engine.compute(df.iloc[:0], cache=cache)
+
+    cached = engine.compute(df, cache=cache)
+
+    assert engine.last_run_stats == {"q": len(df)}
+    pd.testing.assert_frame_equal(cached, engine.compute(df))
+
+
+def test_unchanged_rows_are_reused():
+    engine, df, cache = _engine(), _items(), ScoringCache()
+    engine.compute(df, cache=cache)
+    changed = df.copy()
+    changed.loc[1, "q_1"] = 7
+
+    cached = engine.compute(changed, cache=cache)
+
+    assert engine.last_run_stats == {"q": 1}
+    pd.testing.assert_frame_equal(cached, engine.compute(changed))